@@ -1,8 +1,123 @@
-DOMAIN = "besmart"
+"""BeSmart integration.
+
+Home Assistant is only imported inside the setup functions, so the
+HA-free client (``api.py``) and its command line tool (``cli.py``) can be
+used from this package without Home Assistant installed.
+"""
+import asyncio
+from datetime import timedelta
+
+from .const import (
+    CONF_BULK_REFRESH,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_WRITE_DELAY,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_WRITE_DELAY,
+    DOMAIN,
+    STARTUP_TIMEOUT,
+)
+
+PLATFORMS = ["binary_sensor", "climate", "number", "sensor"]
 
 async def async_setup(hass, config):
+    from .services import async_setup_services
+
+    async_setup_services(hass)
     return True
 async def async_setup_entry(hass, entry):
-    hass.config_entries.async_setup_platforms(entry, ["climate"])
+    from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+    from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+
+    from .clients import async_get_client
+    from .coordinator import BesmartCoordinator
+    from .store import BesmartStore
+
+    if CONF_USERNAME not in entry.data:
+        # the first config flow stored a therId only: reauth collects the login
+        raise ConfigEntryAuthFailed("BeSmart username and password are missing")
+    besmart = async_get_client(hass, entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD])
+    store = BesmartStore(hass, entry.entry_id)
+    saved = await store.async_load()
+    if "ther_id" in entry.data:
+        # entries created before room discovery hold a single thermostat
+        ther_id = entry.data["ther_id"]
+        room_names = {ther_id: entry.data.get("room_name", "casa")}
+    elif besmart.cached_rooms is None and saved and saved[0].get("room_names"):
+        # after a restart the saved rooms stand in until the first poll lists them
+        room_names = saved[0]["room_names"]
+    else:
+        rooms = besmart.cached_rooms
+        if rooms is None:
+            try:
+                async with asyncio.timeout(STARTUP_TIMEOUT):
+                    rooms = await besmart.rooms()
+            except TimeoutError:
+                rooms = None
+        if rooms is None:
+            raise ConfigEntryNotReady("Could not list the rooms of the BeSmart account")
+        room_names = {
+            str(room["therId"]): room.get("name") or f"BeSmart {room['therId']}"
+            for room in rooms.values()
+            if room.get("therId") is not None
+        }
+
+    coordinator = BesmartCoordinator(
+        hass,
+        besmart,
+        list(room_names),
+        room_names=room_names,
+        bulk=entry.options.get(CONF_BULK_REFRESH, True),
+        write_delay=entry.options.get(CONF_WRITE_DELAY, DEFAULT_WRITE_DELAY),
+        min_interval=timedelta(
+            seconds=entry.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL.total_seconds())
+        ),
+        max_interval=timedelta(
+            seconds=entry.options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL.total_seconds())
+        ),
+        store=store,
+    )
+    if saved:
+        coordinator.restore(*saved)
+
+    last_known = coordinator.poller.last_known()
+    if last_known:
+        # show the last known state at once and revalidate in the background,
+        # so neither the number of rooms nor cloud latency delays startup
+        coordinator.data = last_known
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {entry.title}"
+        )
+    else:
+        try:
+            async with asyncio.timeout(STARTUP_TIMEOUT):
+                await coordinator.async_config_entry_first_refresh()
+        except TimeoutError as ex:
+            raise ConfigEntryNotReady("Timed out fetching BeSmart room data") from ex
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
+
+async def async_unload_entry(hass, entry):
+    from .clients import async_release_client
+
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        # the coordinator shuts down by itself through entry.async_on_unload
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await async_release_client(hass, coordinator.besmart.username)
+    return unloaded
+
+
+async def async_remove_entry(hass, entry):
+    from homeassistant.const import CONF_USERNAME
+
+    from .clients import async_release_client
+    from .store import BesmartStore
+
+    await BesmartStore(hass, entry.entry_id).async_remove()
+    if CONF_USERNAME in entry.data:
+        await async_release_client(hass, entry.data[CONF_USERNAME])
@@ -0,0 +1,543 @@
+"""BeSmart cloud client, free of Home Assistant imports.
+
+Used by the integration and by the command line tool in ``cli.py``.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import replace
+from datetime import datetime
+from functools import partial
+from urllib.parse import urlencode
+
+import aiohttp
+
+from .metrics import ERROR, OK, TIMEOUT, ClientMetrics
+from .models import DeviceSettings, check_setpoint, encode_setpoint, to_celsius
+from .ratelimit import POLL, WRITE
+from .resilience import (
+    BesmartConnectionError,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+)
+from .singleflight import SingleFlight
+
+_LOGGER = logging.getLogger(__name__)
+
+# BeSmart state constants
+BESMART_MODE_OFF = "0"
+BESMART_MODE_HEAT = "1"
+BESMART_STATE_OFF = 5
+BESMART_STATE_AUTO = 2
+BESMART_STATE_MANUAL = 3
+
+
+class Besmart:
+    BASE_URL = "http://www.besmart-home.com/Android_vokera_20160516/"
+    LOGIN = "login.php"
+    ROOM_LIST = "getRoomList.php?deviceId={0}"
+    ROOM_DATA = "getRoomData196.php?therId={0}&deviceId={1}"
+    ROOM_MODE = "setRoomMode.php"
+    ROOM_TEMP = "setRoomTemp.php"
+    ROOM_CONF_TEMP = "setComfTemp.php"
+    ROOM_ECON_TEMP = "setEconTemp.php"
+    ROOM_FROST_TEMP = "setFrostTemp.php"
+    GET_SETTINGS = "getSetting.php"
+    SET_SETTINGS = "setSetting.php"
+    # room payload field each setpoint endpoint writes
+    SETPOINT_FIELDS = {
+        ROOM_TEMP: "comfT",
+        ROOM_CONF_TEMP: "comfT",
+        ROOM_ECON_TEMP: "saveT",
+        ROOM_FROST_TEMP: "frostT",
+    }
+    # Sessions are reused until they expire or the cloud rejects them
+    SESSION_TTL = 1800
+    # "error" code of an answer to a session the cloud no longer knows
+    SESSION_EXPIRED = 2
+    # season changes trust a settings snapshot this recent (seconds) without re-reading it
+    SETTINGS_TTL = 3600
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 10
+
+    def __init__(
+        self,
+        username,
+        password,
+        session=None,
+        session_ttl=SESSION_TTL,
+        base_url=None,
+        retry=None,
+        breaker=None,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        metrics=None,
+        read_cache_ttl=0.0,
+        limiter=None,
+        host_limiter=None,
+    ):
+        self._username = username
+        self._password = password
+        self._device = None
+        self._rooms = None
+        self._lastupdate = None
+        self._timeout = aiohttp.ClientTimeout(
+            total=None, connect=connect_timeout, sock_read=read_timeout
+        )
+        self._retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or ClientMetrics()
+        # concurrent reads of the same data share one request
+        self.reads = SingleFlight(read_cache_ttl)
+        # token buckets of the account and of the cloud host, None for no limit
+        self.limiter = limiter
+        self.host_limiter = host_limiter
+        # Home Assistant passes its pooled session; standalone use gets a private one
+        self._s = session
+        self._own_session = session is None
+        self._base_url = base_url or self.BASE_URL
+        self._session_ttl = session_ttl
+        self._login_time = None
+        # therId -> roomMark, tempUnit and settings, filled by the normal poll
+        self._meta = {}
+        # concurrent reads wait for one login instead of each starting their own
+        self._login_lock = asyncio.Lock()
+        # bumped when a login attempt ends, so callers queued behind it share its outcome
+        self._login_attempt = 0
+        self.logins = 0
+        self.logins_avoided = 0
+        # rooms answering "session expired" even right after a login, not worth another
+        self._refused_rooms = set()
+        # setpoint writes answered from the cache because nothing would change
+        self.writes_skipped = 0
+
+    @property
+    def username(self):
+        return self._username
+
+    def has_credentials(self, username, password):
+        """Whether this client logs in with these credentials."""
+        return username.lower() == self._username.lower() and password == self._password
+
+    @property
+    def cached_rooms(self):
+        """The last room list fetched, keyed by lowercase name, None if never fetched."""
+        return self._rooms
+
+    @property
+    def login_stats(self):
+        """Login and skipped-write counters, to see how many round-trips the caches save."""
+        return {
+            "logins": self.logins,
+            "logins_avoided": self.logins_avoided,
+            "writes_skipped": self.writes_skipped,
+        }
+
+    def _session(self):
+        if self._s is None:
+            # unsafe: keep the session cookie of IP hosts too, e.g. a local fake cloud
+            self._s = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+        return self._s
+
+    async def close(self):
+        if self._own_session and self._s is not None:
+            await self._s.close()
+            self._s = None
+
+    def session_valid(self):
+        if not self._device or not self._device.get("deviceId"):
+            return False
+        if self._login_time is None:
+            return False
+        return time.monotonic() - self._login_time < self._session_ttl
+
+    def invalidate_session(self):
+        self._device = None
+        self._login_time = None
+
+    async def _request(self, method, path, data=None, priority=POLL):
+        """Send a request with retries, behind the circuit breaker and rate limiters.
+
+        Returns the HTTP status and the decoded JSON body (None unless the
+        status is 2xx). Raises BesmartConnectionError once the retries are
+        used up, or CircuitOpenError while the breaker is open.
+        """
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"BeSmart cloud unavailable, not calling {path}")
+        try:
+            return await self._attempts(method, path, data, priority)
+        finally:
+            if probe:
+                # cancelled or failed unexpectedly: let the next call probe again
+                self.breaker.release()
+
+    async def _attempts(self, method, path, data, priority):
+        sent = len(urlencode(data)) if data else 0
+        for attempt in range(self._retry.attempts):
+            for limiter in (self.limiter, self.host_limiter):
+                if limiter is not None:
+                    await limiter.acquire(priority)
+            start = time.monotonic()
+            received = 0
+            try:
+                async with self._session().request(
+                    method, self._base_url + path, data=data, timeout=self._timeout
+                ) as resp:
+                    received = len(await resp.read())
+                    if resp.status >= 500:
+                        raise BesmartConnectionError(f"{path} answered HTTP {resp.status}")
+                    result = resp.status, await resp.json(content_type=None) if resp.ok else None
+            except (
+                aiohttp.ClientError, asyncio.TimeoutError, BesmartConnectionError, ValueError
+            ) as ex:
+                # ValueError: a body that is not JSON, e.g. a maintenance page
+                outcome = TIMEOUT if isinstance(ex, asyncio.TimeoutError) else ERROR
+                self.metrics.record(
+                    path, start, time.monotonic() - start, outcome, sent, received
+                )
+                if attempt + 1 < self._retry.attempts:
+                    delay = self._retry.delay(attempt)
+                    _LOGGER.debug("%s failed (%s), retrying in %.2fs", path, ex, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_failure()
+                raise BesmartConnectionError(f"{path} failed: {ex}") from ex
+            except BaseException:
+                self.metrics.record(path, start, time.monotonic() - start, ERROR, sent, received)
+                raise
+            self.metrics.record(path, start, time.monotonic() - start, OK, sent, received)
+            self.breaker.record_success()
+            return result
+
+    async def _post(self, path, data=None, priority=POLL):
+        return await self._request("POST", path, data, priority)
+
+    async def _get(self, path):
+        return await self._request("GET", path)
+
+    async def login(self):
+        self.logins += 1
+        self.metrics.record_login()
+        try:
+            # writes wait on logins too, so they share the write priority
+            _, device = await self._post(
+                self.LOGIN,
+                data={"un": self._username, "pwd": self._password, "version": "32"},
+                priority=WRITE,
+            )
+            _LOGGER.debug("Login response: %s", device)
+            if device is not None:
+                self._device = device
+                self._login_time = time.monotonic()
+        except Exception as ex:
+            _LOGGER.warning("Login failed: %s", ex)
+            self.invalidate_session()
+        finally:
+            self._login_attempt += 1
+
+    async def ensure_login(self):
+        """Log in only if there is no usable session.
+
+        Callers queued behind a login share its outcome: when it failed they
+        return False at once instead of each trying again. No login is tried
+        while the circuit breaker is open.
+        """
+        attempt = self._login_attempt
+        async with self._login_lock:
+            if self.session_valid():
+                self.logins_avoided += 1
+                return True
+            if self._login_attempt != attempt or self.breaker.state == CircuitBreaker.OPEN:
+                return False
+            await self.login()
+            return self.session_valid()
+
+    async def rooms(self):
+        return await self.reads.do(("rooms",), self._fetch_rooms)
+
+    async def _fetch_rooms(self):
+        for _ in range(2):
+            reused = self.session_valid()
+            if not await self.ensure_login():
+                return None
+            try:
+                status, data = await self._post(
+                    self.ROOM_LIST.format(self._device.get("deviceId"))
+                )
+                _LOGGER.debug("Room list response: %s", data)
+            except BesmartConnectionError as ex:
+                _LOGGER.warning("Room fetch failed: %s", ex)
+                return None
+            except Exception as ex:
+                _LOGGER.warning("Room fetch failed: %s", ex)
+                self.invalidate_session()
+                return None
+            if reused and self._session_rejected(status, data):
+                _LOGGER.debug("Cached session rejected, logging in again")
+                self.invalidate_session()
+                continue
+            if isinstance(data, list):
+                self._lastupdate = datetime.now()
+                self._rooms = {
+                    y.get("name").lower(): y
+                    for y in filter(lambda x: x.get("id") is not None, data)
+                }
+                for room in self._rooms.values():
+                    if room.get("therId") is not None:
+                        self._remember(room["therId"], room)
+                return self._rooms
+            return None
+        return None
+
+    async def roomdata(self, room):
+        if room is None:
+            _LOGGER.warning("roomdata called with None room")
+            return None
+        return await self.reads.do(
+            ("roomdata", str(room.get("therId"))), partial(self._fetch_roomdata, room)
+        )
+
+    async def _fetch_roomdata(self, room):
+        for _ in range(2):
+            reused = self.session_valid()
+            if not await self.ensure_login():
+                return None
+            try:
+                status, data = await self._get(
+                    self.ROOM_DATA.format(room.get("therId"), self._device.get("deviceId"))
+                    + "&boilerIsConnected=1"
+                )
+            except BesmartConnectionError as ex:
+                _LOGGER.warning("roomdata error: %s", ex)
+                return None
+            except Exception as ex:
+                _LOGGER.warning("roomdata error: %s", ex)
+                self.invalidate_session()
+                return None
+            ther_id = str(room.get("therId"))
+            if self._session_rejected(status, data):
+                if reused and ther_id not in self._refused_rooms:
+                    # the cloud may have dropped a session we still consider fresh
+                    _LOGGER.debug("Cached session rejected, logging in again")
+                    self.invalidate_session()
+                    continue
+                if not reused:
+                    # a fresh session did not help: the room itself is refused
+                    self._refused_rooms.add(ther_id)
+            if isinstance(data, dict) and data.get("error") == 0:
+                self._refused_rooms.discard(ther_id)
+                self._remember(ther_id, data)
+            return data
+        return None
+
+    @classmethod
+    def _session_rejected(cls, status, data):
+        """Whether an answer says the session is gone, not that the request was wrong."""
+        if status in (401, 403):
+            return True
+        return isinstance(data, dict) and data.get("error") == cls.SESSION_EXPIRED
+
+    async def roomByTherId(self, therId, name=""):
+        """Recupera i dati stanza direttamente tramite therId, ignorando il nome stanza."""
+        room = {"therId": therId, "name": name}
+        return await self.roomdata(room)
+
+    def _remember(self, ther_id, payload):
+        """Keep what the setters need from a room payload, so writes skip a fetch."""
+        meta = self._meta.setdefault(str(ther_id), {})
+        for key in ("roomMark", "tempUnit", *self.SETPOINT_FIELDS.values()):
+            if payload.get(key) is not None:
+                meta[key] = payload[key]
+
+    def meta_snapshot(self, ther_ids):
+        """Copy of the cached metadata of some rooms, for persisting.
+
+        Setpoints are left out: after a restart they may be stale, and a
+        stale one would make a real change look like a no-op.
+        """
+        skip = set(self.SETPOINT_FIELDS.values())
+        return {
+            str(ther_id): {
+                key: value for key, value in self._meta[str(ther_id)].items() if key not in skip
+            }
+            for ther_id in ther_ids
+            if str(ther_id) in self._meta
+        }
+
+    def restore_meta(self, meta):
+        """Seed the metadata cache, keeping anything fetched since."""
+        for ther_id, values in meta.items():
+            self._meta.setdefault(str(ther_id), dict(values))
+
+    def forget(self, ther_id):
+        """Drop the cached metadata of a room, it is re-read on next use."""
+        self._meta.pop(str(ther_id), None)
+
+    async def room_meta(self, ther_id):
+        """Cached roomMark/tempUnit/settings of a room, fetched if unknown."""
+        meta = self._meta.get(str(ther_id))
+        if not meta or meta.get("roomMark") is None:
+            data = await self.roomByTherId(ther_id, "casa")
+            if isinstance(data, dict) and data.get("error") == 0:
+                # a cached read does not pass through _fetch_roomdata
+                self._remember(ther_id, data)
+            meta = self._meta.get(str(ther_id))
+        if not meta or meta.get("roomMark") is None:
+            return None
+        return meta
+
+    async def _command(self, ther_id, path, data, success):
+        """POST a command; unexpected answers invalidate the cached room metadata."""
+        write = path != self.GET_SETTINGS
+        keys = ("rooms",), ("roomdata", str(ther_id)), ("settings", str(ther_id))
+        if write:
+            # whatever the outcome, cached reads of the room may now be wrong
+            self.reads.invalidate(*keys)
+        priority = WRITE if write else POLL
+        try:
+            status, msg = await self._post(path, data=data, priority=priority)
+        except Exception:
+            self.forget(ther_id)
+            raise
+        finally:
+            if write:
+                # reads sent while the write was under way may have missed it
+                self.reads.invalidate(*keys)
+        _LOGGER.debug("%s response: %s", path, msg)
+        if isinstance(msg, dict) and msg.get("error") == success:
+            return msg
+        _LOGGER.warning("Unexpected %s response for room %s: %s", path, ther_id, msg)
+        self.forget(ther_id)
+        if self._session_rejected(status, msg):
+            self.invalidate_session()
+        return None
+
+    async def setRoomMode(self, room_name, mode):
+        meta = await self.room_meta(room_name)
+        if meta and await self.ensure_login():
+            data = {
+                "deviceId": self._device.get("deviceId"),
+                "therId": meta["roomMark"],
+                "mode": mode,
+            }
+            if await self._command(room_name, self.ROOM_MODE, data, 1):
+                return True
+        return None
+
+    async def setRoomTemp(self, room_name, new_temp, url=None):
+        """Write a setpoint in the room's unit.
+
+        Raises InvalidSetpointError before any request for a value out of
+        range, and returns True without a request when the setpoint cached
+        from the last poll already has that value.
+        """
+        url = url or self.ROOM_TEMP
+        meta = await self.room_meta(room_name)
+        if meta:
+            new_temp = check_setpoint(new_temp, meta.get("tempUnit"))
+            field = self.SETPOINT_FIELDS[url]
+            try:
+                unchanged = abs(float(meta.get(field)) - new_temp) < 0.05
+            except (TypeError, ValueError):
+                unchanged = False
+            if unchanged:
+                _LOGGER.debug("%s of room %s is already %s, not writing", field, room_name, new_temp)
+                self.writes_skipped += 1
+                return True
+        if meta and await self.ensure_login():
+            tpCInt, tpCIntFloat = encode_setpoint(to_celsius(new_temp, meta.get("tempUnit")))
+            data = {
+                "deviceId": self._device.get("deviceId"),
+                "therId": meta["roomMark"],
+                "tempSet": tpCInt,
+                "tempSetFloat": tpCIntFloat,
+            }
+            if await self._command(room_name, url, data, 1):
+                meta[field] = f"{new_temp:.1f}"
+                return True
+        else:
+            _LOGGER.warning("Room not found or device missing for: %s", room_name)
+        return None
+
+    async def setRoomConfortTemp(self, room_name, new_temp):
+        return await self.setRoomTemp(room_name, new_temp, self.ROOM_CONF_TEMP)
+
+    async def setRoomECOTemp(self, room_name, new_temp):
+        return await self.setRoomTemp(room_name, new_temp, self.ROOM_ECON_TEMP)
+
+    async def setRoomFrostTemp(self, room_name, new_temp):
+        return await self.setRoomTemp(room_name, new_temp, self.ROOM_FROST_TEMP)
+
+    def cached_settings(self, ther_id, max_age=None):
+        """Last settings read for a room, None if unknown or older than ``max_age`` seconds."""
+        meta = self._meta.get(str(ther_id)) or {}
+        settings = DeviceSettings.from_payload(meta.get("settings"))
+        if settings is None:
+            return None
+        if max_age is not None and time.time() - meta.get("settings_at", 0) > max_age:
+            return None
+        return settings
+
+    async def device_settings(self, ther_id, max_age=SETTINGS_TTL):
+        """Settings of a room, read from the cloud only when the cached copy is stale."""
+        settings = self.cached_settings(ther_id, max_age)
+        if settings is None:
+            settings = DeviceSettings.from_payload(await self.getSettings(ther_id))
+        return settings
+
+    async def getSettings(self, room_name):
+        return await self.reads.do(
+            ("settings", str(room_name)), partial(self._fetch_settings, room_name)
+        )
+
+    async def _fetch_settings(self, room_name):
+        meta = await self.room_meta(room_name)
+        if meta and await self.ensure_login():
+            data = {
+                "deviceId": self._device.get("deviceId"),
+                "therId": meta["roomMark"],
+            }
+            msg = await self._command(room_name, self.GET_SETTINGS, data, 0)
+            if msg:
+                meta["settings"] = msg
+                # wall clock, so the age survives a restart through the store
+                meta["settings_at"] = time.time()
+                return msg
+        return None
+
+    async def setSettings(self, room_name, season):
+        """Set device settings including season mode (ON/OFF).
+
+        A fresh cached settings snapshot turns this into a single
+        setSetting.php POST; a rejected write re-reads the settings and
+        is retried once.
+
+        Args:
+            room_name: The room identifier
+            season: "0" for OFF, "1" for HEAT mode
+        """
+        _LOGGER.debug("Setting season to %s for room %s",
+                     "OFF" if season == BESMART_MODE_OFF else "HEAT",
+                     room_name)
+
+        for _ in range(2):
+            settings = await self.device_settings(room_name)
+            meta = await self.room_meta(room_name)
+            if not settings or not meta or not await self.ensure_login():
+                return None
+            _LOGGER.debug("Current settings: season=%s, unit=%s, boilerIsOnline=%s",
+                         settings.season, settings.unit, settings.boiler_online)
+            data = {
+                "deviceId": self._device.get("deviceId"),
+                "therId": meta["roomMark"],
+                **settings.to_form(season),
+            }
+            msg = await self._command(room_name, self.SET_SETTINGS, data, 0)
+            if msg:
+                # the snapshot may not have come from this meta (cache hit, refetched room)
+                meta["settings"] = replace(settings, season=season).to_payload()
+                return msg
+            # _command dropped the cached room metadata: the retry re-reads it
+        return None
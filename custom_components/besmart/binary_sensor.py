@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.const import EntityCategory
+
+from .const import DOMAIN
+from .entity import BesmartRoomEntity, room_entities
+
+
+@dataclass(frozen=True, kw_only=True)
+class BesmartBinarySensorDescription(BinarySensorEntityDescription):
+    """A flag of a room, read from its decoded ``RoomState``."""
+
+    is_on_fn: Callable[[object], bool]
+
+
+BINARY_SENSORS = (
+    BesmartBinarySensorDescription(
+        key="battery",
+        name="Battery",
+        device_class=BinarySensorDeviceClass.BATTERY,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        # on means low for battery sensors
+        is_on_fn=lambda room: not room.battery_ok,
+    ),
+    BesmartBinarySensorDescription(
+        key="heating",
+        name="Heating",
+        device_class=BinarySensorDeviceClass.HEAT,
+        is_on_fn=lambda room: room.heating,
+    ),
+)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the battery and heating sensors of every thermostat."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(room_entities(coordinator, BesmartBinarySensor, BINARY_SENSORS))
+
+
+class BesmartBinarySensor(BesmartRoomEntity, BinarySensorEntity):
+    """A flag reported in a room's payload."""
+
+    @property
+    def is_on(self):
+        room = self.room
+        return None if room is None else self.entity_description.is_on_fn(room)
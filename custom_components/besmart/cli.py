@@ -0,0 +1,219 @@
+"""Command line access to the BeSmart cloud, without Home Assistant.
+
+    python -m custom_components.besmart.cli login
+    python -m custom_components.besmart.cli rooms
+    python -m custom_components.besmart.cli poll --cycles 10 --output poll.jsonl
+    python -m custom_components.besmart.cli --format csv replay poll.jsonl
+
+Credentials come from ``--username``/``--password`` or the
+BESMART_USERNAME/BESMART_PASSWORD environment variables. ``poll`` writes
+one record per request with its timing; ``replay`` feeds recorded
+payloads (``poll`` output or bare room payloads, one JSON per line) to the
+parser the integration uses, to reproduce parsing bugs offline.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from .api import Besmart
+from .models import RoomState
+from .program import WeekProgram
+
+# payload fields kept as CSV columns; JSONL records carry the whole payload
+PAYLOAD_FIELDS = (
+    "tempNow", "tempOut", "comfT", "saveT", "frostT", "mode", "season", "heating", "bat",
+)
+
+
+class RecordWriter:
+    """Writes dict records as JSON lines or as CSV with a fixed header."""
+
+    def __init__(self, stream, fmt, columns):
+        self._stream = stream
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, columns, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is None:
+            self._stream.write(json.dumps(record) + "\n")
+            return
+        flat = dict(record)
+        for key in ("payload", "state"):
+            nested = flat.pop(key, None)
+            if isinstance(nested, dict):
+                flat.update(nested)
+        self._csv.writerow(flat)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _login(besmart, args, writer):
+    start = time.perf_counter()
+    ok = await besmart.ensure_login()
+    writer.write({
+        "time": _now(),
+        "ok": ok,
+        "device_id": besmart._device.get("deviceId") if ok else None,
+        "elapsed_ms": _elapsed_ms(start),
+    })
+    return ok
+
+
+async def _rooms(besmart, args, writer):
+    start = time.perf_counter()
+    rooms = await besmart.rooms()
+    elapsed = _elapsed_ms(start)
+    for room in (rooms or {}).values():
+        writer.write({
+            "time": _now(),
+            "ther_id": room.get("therId"),
+            "name": room.get("name"),
+            "elapsed_ms": elapsed,
+            "payload": room,
+        })
+    return rooms is not None
+
+
+async def _poll(besmart, args, writer):
+    ther_ids = args.ther_id
+    if not ther_ids:
+        rooms = await besmart.rooms()
+        if rooms is None:
+            return False
+        ther_ids = [str(r["therId"]) for r in rooms.values() if r.get("therId") is not None]
+    limit = asyncio.Semaphore(args.concurrency)
+    failures = 0
+
+    async def fetch(cycle, ther_id):
+        nonlocal failures
+        async with limit:
+            start = time.perf_counter()
+            data = await besmart.roomByTherId(ther_id)
+            elapsed = _elapsed_ms(start)
+        ok = isinstance(data, dict) and data.get("error") == 0
+        failures += not ok
+        writer.write({
+            "time": _now(),
+            "cycle": cycle,
+            "ther_id": ther_id,
+            "elapsed_ms": elapsed,
+            "ok": ok,
+            "payload": data,
+        })
+
+    for cycle in range(args.cycles):
+        if cycle:
+            await asyncio.sleep(args.interval)
+        await asyncio.gather(*(fetch(cycle, ther_id) for ther_id in ther_ids))
+    print(json.dumps(besmart.metrics.totals), file=sys.stderr)
+    return not failures
+
+
+def replay(lines, writer, when=None):
+    """Decode recorded room payloads as the climate entity does; return the failure count."""
+    when = when or datetime.now()
+    failures = 0
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        start = time.perf_counter()
+        try:
+            record = json.loads(line)
+            payload = record.get("payload", record)
+            room = RoomState.from_payload(payload)
+            program = WeekProgram(room.program)
+            result = {
+                "line": number,
+                "ther_id": room.ther_id,
+                "ok": True,
+                "state": {k: v for k, v in asdict(room).items() if k != "program"},
+                "preset_mark": program.mark_at(when),
+                "next_change": (
+                    next_change.isoformat()
+                    if (next_change := program.next_change(when)) else None
+                ),
+            }
+        except Exception as ex:
+            failures += 1
+            result = {"line": number, "ok": False, "error": f"{type(ex).__name__}: {ex}"}
+        result["parse_us"] = round((time.perf_counter() - start) * 1e6, 1)
+        writer.write(result)
+    return failures
+
+
+COMMANDS = {"login": _login, "rooms": _rooms, "poll": _poll}
+
+COLUMNS = {
+    "login": ("time", "ok", "device_id", "elapsed_ms"),
+    "rooms": ("time", "ther_id", "name", "elapsed_ms", *PAYLOAD_FIELDS),
+    "poll": ("time", "cycle", "ther_id", "elapsed_ms", "ok", *PAYLOAD_FIELDS),
+    "replay": (
+        "line", "ther_id", "ok", "parse_us", "error", "preset_mark", "next_change",
+        *RoomState.__dataclass_fields__,
+    ),
+}
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="besmart", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--username", default=os.environ.get("BESMART_USERNAME"))
+    parser.add_argument("--password", default=os.environ.get("BESMART_PASSWORD"))
+    parser.add_argument("--base-url", help="cloud URL, e.g. a local fake server")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--output", help="file to write to instead of stdout")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("login", help="log in and print the device id")
+    commands.add_parser("rooms", help="list the rooms of the account")
+    poll = commands.add_parser("poll", help="fetch room data concurrently, with timings")
+    poll.add_argument("--ther-id", action="append", help="room to poll, default all rooms")
+    poll.add_argument("--cycles", type=int, default=1)
+    poll.add_argument("--interval", type=float, default=0.0, help="seconds between cycles")
+    poll.add_argument("--concurrency", type=int, default=8)
+    replay_cmd = commands.add_parser("replay", help="parse recorded payloads offline")
+    replay_cmd.add_argument("file", help="JSONL file, '-' for stdin")
+    return parser
+
+
+async def _run(args, writer):
+    besmart = Besmart(args.username, args.password, base_url=args.base_url)
+    try:
+        return await COMMANDS[args.command](besmart, args, writer)
+    finally:
+        await besmart.close()
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = RecordWriter(output, args.format, COLUMNS[args.command])
+        if args.command == "replay":
+            if args.file == "-":
+                return 1 if replay(sys.stdin, writer) else 0
+            with open(args.file) as lines:
+                return 1 if replay(lines, writer) else 0
+        if not args.username or not args.password:
+            print("BeSmart username and password are required", file=sys.stderr)
+            return 2
+        return 0 if asyncio.run(_run(args, writer)) else 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
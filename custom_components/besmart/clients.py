@@ -0,0 +1,50 @@
+"""Besmart clients shared per account by config entries and YAML platforms."""
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .api import Besmart
+from .const import (
+    ACCOUNT_BURST,
+    ACCOUNT_RATE,
+    DATA_CLIENTS,
+    DATA_HOST_LIMITER,
+    DOMAIN,
+    HOST_BURST,
+    HOST_RATE,
+)
+from .ratelimit import TokenBucket
+
+
+@callback
+def async_get_client(hass, username, password):
+    """Return the Besmart client of an account, shared by all its entries and entities."""
+    data = hass.data.setdefault(DOMAIN, {})
+    clients = data.setdefault(DATA_CLIENTS, {})
+    client = clients.get(username.lower())
+    if client is None or not client.has_credentials(username, password):
+        # all accounts talk to the same cloud host, which gets its own budget
+        host_limiter = data.get(DATA_HOST_LIMITER)
+        if host_limiter is None:
+            host_limiter = data[DATA_HOST_LIMITER] = TokenBucket(HOST_RATE, HOST_BURST)
+        client = Besmart(
+            username,
+            password,
+            async_create_clientsession(hass),
+            limiter=TokenBucket(ACCOUNT_RATE, ACCOUNT_BURST),
+            host_limiter=host_limiter,
+        )
+        clients[username.lower()] = client
+    return client
+
+
+async def async_release_client(hass, username):
+    """Forget the client of an account once no loaded entry uses it."""
+    data = hass.data.get(DOMAIN, {})
+    clients = data.get(DATA_CLIENTS, {})
+    client = clients.get(username.lower())
+    if client is None:
+        return
+    if any(getattr(value, "besmart", None) is client for value in data.values()):
+        return
+    del clients[username.lower()]
+    await client.close()
@@ -1,6 +1,5 @@
 import logging
-from datetime import datetime, timedelta
-import requests
+from functools import partial
 import voluptuous as vol
 
 from homeassistant.components.climate import (
@@ -19,42 +18,43 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_PASSWORD,
     CONF_ROOM,
+    CONF_SCAN_INTERVAL,
     CONF_USERNAME,
     UnitOfTemperature,
 )
 import homeassistant.helpers.config_validation as cv
 
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-from .const import DOMAIN
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+# Besmart is also re-exported here for code importing it from the platform
+from .api import BESMART_MODE_HEAT, BESMART_MODE_OFF, BESMART_STATE_OFF, Besmart
+from .clients import async_get_client
+from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+from .coordinator import BesmartCoordinator
+from .models import CELSIUS_UNITS, RoomState, check_setpoint, setpoint_range
+from .program import WeekProgram
+from .resilience import BesmartError, InvalidSetpointError
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
-    """Set up BeSmart climate entity from a config entry."""
-    username = entry.data.get("username")
-    password = entry.data.get("password")
-    ther_id = entry.data.get("ther_id")
-    room_name = entry.data.get("room_name", "casa")
-
-    besmart = Besmart(username, password)
-    besmart.login()
-    room = besmart.roomByTherId(ther_id, room_name)
+    """Set up a BeSmart climate entity for every thermostat of the account."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        Thermostat(coordinator, ther_id, coordinator.room_names.get(ther_id, DEFAULT_NAME))
+        for ther_id in coordinator.ther_ids
+    )
 
-    async_add_entities([BeSmartClimate(besmart, room, room_name)])
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_NAME = "BeSmart Thermostat"
 
-# BeSmart state constants
-BESMART_MODE_OFF = "0"
-BESMART_MODE_HEAT = "1"
-BESMART_STATE_OFF = 5
-BESMART_STATE_AUTO = 2
-BESMART_STATE_MANUAL = 3
-
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Required(CONF_USERNAME): cv.string,
     vol.Required(CONF_PASSWORD): cv.string,
@@ -62,216 +62,23 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
 })
 
-def setup_platform(hass, config, add_entities, discovery_info=None):
-    thermostat = Thermostat(
-        config.get(CONF_NAME),
-        config.get(CONF_USERNAME),
-        config.get(CONF_PASSWORD),
-        config.get(CONF_ROOM),
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    besmart = async_get_client(hass, config.get(CONF_USERNAME), config.get(CONF_PASSWORD))
+    coordinator = BesmartCoordinator(
+        hass,
+        besmart,
+        [config.get(CONF_ROOM)],
+        update_interval=config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
     )
-    add_entities([thermostat], True)
-class Besmart:
-    BASE_URL = "http://www.besmart-home.com/Android_vokera_20160516/"
-    LOGIN = "login.php"
-    ROOM_LIST = "getRoomList.php?deviceId={0}"
-    ROOM_DATA = "getRoomData196.php?therId={0}&deviceId={1}"
-    ROOM_MODE = "setRoomMode.php"
-    ROOM_TEMP = "setRoomTemp.php"
-    ROOM_CONF_TEMP = "setComfTemp.php"
-    ROOM_ECON_TEMP = "setEconTemp.php"
-    ROOM_FROST_TEMP = "setFrostTemp.php"
-    GET_SETTINGS = "getSetting.php"
-    SET_SETTINGS = "setSetting.php"
-
-    def __init__(self, username, password):
-        self._username = username
-        self._password = password
-        self._device = None
-        self._rooms = None
-        self._lastupdate = None
-        self._timeout = 30
-        self._s = requests.Session()
-
-    def login(self):
-        try:
-            resp = self._s.post(
-                self.BASE_URL + self.LOGIN,
-                data={"un": self._username, "pwd": self._password, "version": "32"},
-                timeout=self._timeout,
-            )
-            _LOGGER.debug("Login response: %s", self._device)
-            if resp.ok:
-                self._device = resp.json()
-        except Exception as ex:
-            _LOGGER.warning("Login failed: %s", ex)
-            self._device = None
-
-    def rooms(self):
-        if not self._device:
-            self.login()
-        try:
-            if self._device:
-                resp = self._s.post(
-                    self.BASE_URL + self.ROOM_LIST.format(self._device.get("deviceId")),
-                    timeout=self._timeout,
-                )
-                _LOGGER.debug("Room list response: %s", resp.text)
-                if resp.ok:
-                    self._lastupdate = datetime.now()
-                    self._rooms = {
-                        y.get("name").lower(): y
-                        for y in filter(lambda x: x.get("id") is not None, resp.json())
-                    }
-                    return self._rooms
-        except Exception as ex:
-            _LOGGER.warning("Room fetch failed: %s", ex)
-            self._device = None
-        return None
-
-    def roomdata(self, room):
-        if room is None:
-            _LOGGER.warning("roomdata called with None room")
-            return None
-        self.login()
-        try:
-            if self._device:
-                resp = self._s.get(
-                    self.BASE_URL + self.ROOM_DATA.format(
-                        room.get("therId"), self._device.get("deviceId")
-                    ) + "&boilerIsConnected=1",
-                    timeout=self._timeout,
-                )
-                if resp.ok:
-                    return resp.json()
-        except Exception as ex:
-            _LOGGER.warning("roomdata error: %s", ex)
-            self._device = None
-        return None
-
-    def roomByTherId(self, therId, name=""):
-        """Recupera i dati stanza direttamente tramite therId, ignorando il nome stanza."""
-        if not self._device:
-            self.login()
-    
-        room = {"therId": therId, "name": name}
-        return self.roomdata(room)
-
-    def setRoomMode(self, room_name, mode):
-        room = self.roomByTherId(room_name, "casa")
-        if self._device and room:
-            data = {
-                "deviceId": self._device.get("deviceId"),
-                "therId": room.get("roomMark"),
-                "mode": mode,
-            }
-            resp = self._s.post(self.BASE_URL + self.ROOM_MODE, data=data, timeout=self._timeout)
-            if resp.ok:
-                msg = resp.json()
-                _LOGGER.debug("setRoomMode response: %s", msg)
-                if msg.get("error") == 1:
-                    return True
-        return None
-
-    def setRoomTemp(self, room_name, new_temp, url=None):
-        url = url or self.ROOM_TEMP
-        room = self.roomByTherId(room_name, "casa")
-        if room and self._device and self._device.get("deviceId"):
-            new_temp = round(new_temp, 1)
-            if room.get("tempUnit") in {"N/A", "0"}:
-                tpCInt, tpCIntFloat = str(new_temp).split(".")
-            else:
-                tpCInt, tpCIntFloat = str(round((new_temp - 32.0) / 1.8, 1)).split(".")
-            data = {
-                "deviceId": self._device.get("deviceId"),
-                "therId": room.get("roomMark"),
-                "tempSet": tpCInt,
-                "tempSetFloat": tpCIntFloat,
-            }
-            resp = self._s.post(self.BASE_URL + url, data=data, timeout=self._timeout)
-            if resp.ok:
-                msg = resp.json()
-                _LOGGER.debug("setRoomTemp response: %s", msg)
-                if msg.get("error") == 1:
-                    return True
-        else:
-            _LOGGER.warning("Room not found or device missing for: %s", room_name)
-        return None
-
-    def setRoomConfortTemp(self, room_name, new_temp):
-        return self.setRoomTemp(room_name, new_temp, self.ROOM_CONF_TEMP)
-
-    def setRoomECOTemp(self, room_name, new_temp):
-        return self.setRoomTemp(room_name, new_temp, self.ROOM_ECON_TEMP)
-
-    def setRoomFrostTemp(self, room_name, new_temp):
-        return self.setRoomTemp(room_name, new_temp, self.ROOM_FROST_TEMP)
-
-    def getSettings(self, room_name):
-        room = self.roomByTherId(room_name, "casa")
-        if self._device and room:
-            data = {
-                "deviceId": self._device.get("deviceId"),
-                "therId": room.get("roomMark"),
-            }
-            resp = self._s.post(self.BASE_URL + self.GET_SETTINGS, data=data, timeout=self._timeout)
-            if resp.ok:
-                msg = resp.json()
-                _LOGGER.debug("getSettings response: %s", msg)
-                if msg.get("error") == 0:
-                    return msg
-        return None
-
-    def setSettings(self, room_name, season):
-        """Set device settings including season mode (ON/OFF).
-        
-        Args:
-            room_name: The room identifier
-            season: "0" for OFF, "1" for HEAT mode
-        """
-        _LOGGER.debug("Setting season to %s for room %s", 
-                     "OFF" if season == BESMART_MODE_OFF else "HEAT",
-                     room_name)
-        
-        room = self.roomByTherId(room_name, "casa")
-        if self._device and room:
-            old_data = self.getSettings(room_name)
-            _LOGGER.debug("Current settings: season=%s, unit=%s, boilerIsOnline=%s",
-                         old_data.get("season") if old_data else None,
-                         old_data.get("unit") if old_data else None,
-                         old_data.get("boilerIsOnline") if old_data else None)
-            
-            if old_data and old_data.get("error") == 0:
-                min_ip, min_fp = str(old_data.get("minTempSetPoint", "30.0")).split(".")
-                max_ip, max_fp = str(old_data.get("maxTempSetPoint", "30.0")).split(".")
-                curve_ip, curve_fp = str(old_data.get("tempCurver", "0.0")).split(".")
-                data = {
-                    "deviceId": self._device.get("deviceId"),
-                    "therId": room.get("roomMark"),
-                    "minTempSetPointIP": min_ip,
-                    "minTempSetPointFP": min_fp,
-                    "maxTempSetPointIP": max_ip,
-                    "maxTempSetPointFP": max_fp,
-                    "sensorInfluence": old_data.get("sensorInfluence", "0"),
-                    "tempCurveIP": curve_ip,
-                    "tempCurveFP": curve_fp,
-                    "unit": old_data.get("unit", "0"),
-                    "season": season,
-                    "boilerIsOnline": old_data.get("boilerIsOnline", "0"),
-                }
-                resp = self._s.post(self.BASE_URL + self.SET_SETTINGS, data=data, timeout=self._timeout)
-                if resp.ok:
-                    msg = resp.json()
-                    _LOGGER.debug("setSettings response: %s", msg)
-                    if msg.get("error") == 0:
-                        return msg
-        return None
-class Thermostat(ClimateEntity):
-    def __init__(self, name, username, password, room_name):
+    # the entity shows up right away and becomes available with the first fetch
+    hass.async_create_task(coordinator.async_refresh())
+    async_add_entities([Thermostat(coordinator, config.get(CONF_ROOM), config.get(CONF_NAME))])
+class Thermostat(CoordinatorEntity, ClimateEntity):
+    def __init__(self, coordinator, room_name, name):
+        super().__init__(coordinator)
         self._name = name
-        self._username = username
-        self._password = password
         self._room_name = room_name
-        self._besmart = Besmart(username, password)
+        self._besmart = coordinator.besmart
     
         # Temperature values
         self._comfT = None
@@ -281,6 +88,7 @@ class Thermostat(ClimateEntity):
         self._target_temp_low = None
         self._target_temp_high = None
         self._current_temperature = None
+        self._temp_outdoor = None
     
         # HVAC and preset states
         self._hvac_mode = HVACMode.OFF
@@ -296,7 +104,16 @@ class Thermostat(ClimateEntity):
         self._current_state = 2
         self._current_unit = "0"
         self._season = "1"
+        self._room_state = None
         self._tempSetMark = "2"
+        self._program = None
+        self._next_preset_change = None
+        self._unsub_program_change = None
+        # payload field -> [value, write still in flight] shown until confirmed
+        self._optimistic = {}
+        # effective payload behind the current state, to skip unchanged refreshes
+        self._rendered = None
+        self._was_available = None
     
         # Mapping dictionaries
         self.PRESET_HA_TO_BESMART = {"comfort": "2", "eco": "1", "frost": "0"}
@@ -313,6 +130,9 @@ class Thermostat(ClimateEntity):
             ClimateEntityFeature.PRESET_MODE
         )
 
+        if coordinator.data and room_name in coordinator.data:
+            self._update_from_data(coordinator.data[room_name], coordinator.room_state(room_name))
+
     @property
     def unique_id(self):
         return f"besmart_{self._room_name}"
@@ -324,7 +144,15 @@ class Thermostat(ClimateEntity):
 
     @property
     def temperature_unit(self):
-        return UnitOfTemperature.CELSIUS if self._current_unit == "0" else UnitOfTemperature.FAHRENHEIT
+        return UnitOfTemperature.CELSIUS if self._current_unit in CELSIUS_UNITS else UnitOfTemperature.FAHRENHEIT
+
+    @property
+    def min_temp(self):
+        return setpoint_range(self._current_unit)[0]
+
+    @property
+    def max_temp(self):
+        return setpoint_range(self._current_unit)[1]
 
     @property
     def current_temperature(self):
@@ -361,7 +189,7 @@ class Thermostat(ClimateEntity):
     @property
     def hvac_modes(self):
         return self.HVAC_MODE_LIST
-    def set_temperature(self, **kwargs):
+    async def async_set_temperature(self, **kwargs):
         temperature = kwargs.get(ATTR_TEMPERATURE)
         target_temp_high = kwargs.get(ATTR_TARGET_TEMP_HIGH)
         target_temp_low = kwargs.get(ATTR_TARGET_TEMP_LOW)
@@ -371,83 +199,199 @@ class Thermostat(ClimateEntity):
             temperature, target_temp_low, target_temp_high
         )
 
-        if temperature is not None:
-            self._besmart.setRoomConfortTemp(self._room_name, temperature)
-            self._target_temp = temperature  # ← aggiorna lo stato interno
+        try:
+            for value in (temperature, target_temp_low):
+                if value is not None:
+                    check_setpoint(value, self._current_unit)
+        except InvalidSetpointError as ex:
+            raise ServiceValidationError(str(ex)) from ex
 
+        if temperature is not None:
+            self._write_optimistic("comfT", "comfort", temperature, self._besmart.setRoomConfortTemp)
 
         if target_temp_low is not None:
-            self._besmart.setRoomECOTemp(self._room_name, target_temp_low)
+            self._write_optimistic("saveT", "eco", target_temp_low, self._besmart.setRoomECOTemp)
 
-    def set_preset_mode(self, preset_mode):
+    async def async_set_preset_mode(self, preset_mode):
         mode = self.PRESET_HA_TO_BESMART.get(preset_mode, "2")
-        self._besmart.setRoomMode(self._room_name, mode)
+        self._write_optimistic("mode", "mode", mode, self._besmart.setRoomMode)
         _LOGGER.debug("Set preset_mode: %s (%s)", preset_mode, mode)
 
-    def set_hvac_mode(self, hvac_mode):
+    async def async_set_hvac_mode(self, hvac_mode):
         mode = self.HVAC_MODE_HA_BESMART.get(hvac_mode)
-        result = self._besmart.setSettings(self._room_name, mode)
-        _LOGGER.debug("Set hvac_mode: %s (%s) -> result: %s", hvac_mode, mode, result)
-        if result:
-            # Update internal state immediately
-            self._season = mode
-            # Force an immediate update to refresh all states
-            self.update()
-
-    def update(self):
-        _LOGGER.debug("🔄 Update called for room: %s", self._room_name)
-        data = self._besmart.roomByTherId(self._room_name, "casa")
-    
-        if not data or data.get("error") != 0:
-            _LOGGER.warning("⚠️ No valid data received for room: %s", self._room_name)
+        _LOGGER.debug("Set hvac_mode: %s (%s)", hvac_mode, mode)
+        self._write_optimistic("season", "season", mode, self._besmart.setSettings)
+
+    def _write_optimistic(self, field, kind, value, write):
+        """Show ``value`` right away and send the write in the background.
+
+        The room payload field stays overridden until the write is done and
+        the next coordinator refresh confirms it; a failed write or a device
+        that disagrees rolls the entity back to the device state. A value
+        the device already reports is not written at all.
+        """
+        data = (self.coordinator.data or {}).get(self._room_name) or {}
+        if field not in self._optimistic and self._same_value(field, data.get(field), value):
+            _LOGGER.debug("Room %s already has %s=%s, not writing", self._room_name, field, value)
             return
+        self._optimistic[field] = [value, True]
+        self._render()
+        self.async_write_ha_state()
+        self.hass.async_create_task(self._confirm_write(field, kind, value, write))
+
+    async def _confirm_write(self, field, kind, value, write):
+        try:
+            result = await self._queue_write(kind, value, write)
+        except BesmartError as ex:
+            _LOGGER.warning("Writing %s for room %s failed: %s", field, self._room_name, ex)
+            result = None
+        pending = self._optimistic.get(field)
+        if pending is None or pending[0] != value:
+            # superseded by a newer value, which confirms itself
+            return
+        if not result:
+            _LOGGER.warning(
+                "Writing %s=%s for room %s failed, rolling back", field, value, self._room_name
+            )
+            del self._optimistic[field]
+            self._render()
+            self.async_write_ha_state()
+            return
+        pending[1] = False
+        self.coordinator.note_write()
+        if field == "season":
+            self.coordinator.expire_room(self._room_name)
+        await self.coordinator.async_request_refresh()
+
+    async def _queue_write(self, kind, value, write):
+        """Send a write through the coordinator's coalescing per-room queue."""
+        return await self.coordinator.writes.submit(
+            self._room_name, kind, value, partial(write, self._room_name)
+        )
+
+    @staticmethod
+    def _same_value(field, device, value):
+        if field in ("comfT", "saveT", "frostT"):
+            try:
+                return abs(float(device) - float(value)) < 0.05
+            except (TypeError, ValueError):
+                return False
+        return str(device) == str(value)
+
+    def _render(self, force=False):
+        """Parse the last room payload with the optimistic values laid on top.
+
+        Returns False without parsing when the payload equals the one behind
+        the current state, unless ``force`` is set (e.g. the clock moved on).
+        """
+        data = (self.coordinator.data or {}).get(self._room_name)
+        if not data:
+            return False
+        if self._optimistic:
+            data = dict(data, **{field: value for field, (value, _) in self._optimistic.items()})
+        previous = self._rendered
+        if not force and data == previous:
+            return False
+        if previous is not None and _LOGGER.isEnabledFor(logging.DEBUG):
+            changed = sorted(
+                key for key in data.keys() | previous.keys() if data.get(key) != previous.get(key)
+            )
+            if changed:
+                _LOGGER.debug("Room %s changed: %s", self._room_name, ", ".join(changed))
+        self._rendered = data
+        # without overrides the payload is the coordinator's: reuse its decoded state
+        room = None if self._optimistic else self.coordinator.room_state(self._room_name)
+        self._update_from_data(data, room)
+        return True
+
+    @property
+    def available(self):
+        return super().available and self._room_name in (self.coordinator.data or {})
+
+    @callback
+    def _handle_coordinator_update(self):
+        data = (self.coordinator.data or {}).get(self._room_name)
+        changed = False
+        if data:
+            for field, (value, in_flight) in list(self._optimistic.items()):
+                if in_flight:
+                    continue
+                if not self._same_value(field, data.get(field), value):
+                    _LOGGER.warning(
+                        "Room %s reports %s=%s instead of %s, rolling back",
+                        self._room_name, field, data.get(field), value,
+                    )
+                del self._optimistic[field]
+            changed = self._render()
+        available = self.available
+        if not changed and available == self._was_available:
+            # same payload and availability: no parsing, no state write
+            return
+        self._was_available = available
+        self._schedule_program_change()
+        super()._handle_coordinator_update()
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._schedule_program_change()
+        self.async_on_remove(self._cancel_program_change)
+
+    @callback
+    def _cancel_program_change(self):
+        if self._unsub_program_change:
+            self._unsub_program_change()
+            self._unsub_program_change = None
+
+    @callback
+    def _schedule_program_change(self):
+        """Wake up once at the next program boundary instead of polling for it."""
+        self._cancel_program_change()
+        if self.hass is None or self._next_preset_change is None:
+            return
+        self._unsub_program_change = async_track_point_in_time(
+            self.hass, self._handle_program_change, self._next_preset_change
+        )
+
+    @callback
+    def _handle_program_change(self, now):
+        self._unsub_program_change = None
+        self._render(force=True)
+        self.async_write_ha_state()
+        self._schedule_program_change()
+        # the device switches setpoint at the boundary too
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    def _update_from_data(self, data, room=None):
+        _LOGGER.debug("🔄 Update called for room: %s", self._room_name)
+        if room is None:
+            room = RoomState.from_payload(data)
     
-        # 🔢 Program parsing
+        # 🔢 Program parsing, rebuilt only when the weekly program changes
         try:
-            today = datetime.today().isoweekday() % 7
-            index = datetime.today().hour * 2 + (1 if datetime.today().minute > 30 else 0)
-            programWeek = data.get("programWeek", [])
-            self._tempSetMark = programWeek[today][index] if programWeek else "2"
+            self._program = WeekProgram.update(self._program, room.program)
+            now = dt_util.now()
+            self._tempSetMark = self._program.mark_at(now)
+            self._next_preset_change = self._program.next_change(now)
         except Exception as ex:
             _LOGGER.warning("Program parsing error: %s", ex)
             self._tempSetMark = "2"
+            self._next_preset_change = None
     
-        # 🔋 Battery status
-        try:
-            self._battery = not bool(int(data.get("bat", "0")))
-        except (TypeError, ValueError):
-            self._battery = False
-    
-        # 🌡️ Temperature parsing
-        def safe_float(value, fallback):
-            try:
-                return float(value)
-            except (TypeError, ValueError):
-                return fallback
-    
-        self._frostT = safe_float(data.get("frostT"), 5.0)
-        self._econT = safe_float(data.get("saveT"), 16.0)
-        self._comfT = safe_float(data.get("comfT"), 20.0)
-        self._current_temperature = safe_float(data.get("tempNow"), 20.0)
+        self._room_state = room
+        self._battery = room.battery_ok
+        self._frostT = room.frost
+        self._econT = room.eco
+        self._comfT = room.comfort
+        self._current_temperature = room.temp_now
         self._target_temp = self._comfT
-        self._temp_outdoor = safe_float(data.get("tempOut"), 20.0)
+        self._temp_outdoor = room.temp_out
         self._target_temp_low = self._econT
         self._target_temp_high = self._comfT
+        self._current_unit = room.temp_unit
+        self._season = room.season
+        self._heating_state = room.heating
+        self._current_state = room.mode
 
-    
-        # 🌡️ Unit and season - update these first
-        self._current_unit = data.get("tempUnit", "0")
-        self._season = data.get("season", "1")
-        
-        # 🔥 Heating state
-        self._heating_state = data.get("heating") == "1"
-    
-        # 🎛️ HVAC mode mapping
-        try:
-            self._current_state = int(data.get("mode", "2"))
-        except (TypeError, ValueError):
-            self._current_state = 2
-    
         # Determine HVAC mode and action based on season and current state
         # BeSmart states:
         # - season="0" or current_state=5: device is OFF
@@ -494,4 +438,7 @@ class Thermostat(ClimateEntity):
             "heating_state": self._heating_state,
             "preset_mark": self._tempSetMark,
             "tempOut": self._temp_outdoor,  # ← nuovo attributo
+            "next_preset_change": (
+                self._next_preset_change.isoformat() if self._next_preset_change else None
+            ),
         }
@@ -1,23 +1,77 @@
 from homeassistant import config_entries
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.core import callback
 import voluptuous as vol
 
+from .clients import async_get_client, async_release_client
 from .const import DOMAIN
 
+CREDENTIALS_SCHEMA = vol.Schema({
+    vol.Required(CONF_USERNAME): str,
+    vol.Required(CONF_PASSWORD): str,
+})
+
 class BeSmartConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    _reauth_entry = None
+
     async def async_step_user(self, user_input=None):
+        """Log in once and set up every thermostat of the account."""
         errors = {}
 
         if user_input is not None:
-            return self.async_create_entry(title="BeSmart", data=user_input)
+            username = user_input[CONF_USERNAME]
+            await self.async_set_unique_id(username.lower())
+            self._abort_if_unique_id_configured()
+
+            # the client is kept, so setting up the entry reuses this login
+            besmart = async_get_client(self.hass, username, user_input[CONF_PASSWORD])
+            if not await besmart.ensure_login():
+                errors["base"] = "invalid_auth"
+            else:
+                rooms = await besmart.rooms()
+                if not rooms:
+                    errors["base"] = "no_rooms"
+                else:
+                    return self.async_create_entry(title=username, data=user_input)
+            # no entry is created: do not keep the client around
+            await async_release_client(self.hass, username)
 
         return self.async_show_form(
             step_id="user",
-            data_schema=vol.Schema({
-                vol.Required("ther_id"): str,
-                vol.Optional("room_name", default="casa"): str,
-            }),
+            data_schema=CREDENTIALS_SCHEMA,
+            errors=errors,
+        )
+
+    async def async_step_reauth(self, entry_data):
+        """Ask for the login again, e.g. for entries stored without one."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input=None):
+        errors = {}
+
+        if user_input is not None:
+            besmart = async_get_client(
+                self.hass, user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
+            )
+            if not await besmart.ensure_login():
+                errors["base"] = "invalid_auth"
+                await async_release_client(self.hass, user_input[CONF_USERNAME])
+            else:
+                entry = self._reauth_entry
+                # a legacy entry keeps its ther_id and stays a single thermostat
+                self.hass.config_entries.async_update_entry(
+                    entry, data={**entry.data, **user_input}
+                )
+                self.hass.async_create_task(
+                    self.hass.config_entries.async_reload(entry.entry_id)
+                )
+                return self.async_abort(reason="reauth_successful")
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=CREDENTIALS_SCHEMA,
             errors=errors,
         )
@@ -1 +1,47 @@
+from datetime import timedelta
+
 DOMAIN = "besmart"
+# hass.data[DOMAIN] key of the Besmart clients shared per account
+DATA_CLIENTS = "clients"
+# hass.data[DOMAIN] key of the rate limiter shared by every account
+DATA_HOST_LIMITER = "host_limiter"
+
+DEFAULT_SCAN_INTERVAL = timedelta(seconds=60)
+# full per-room payloads (weekly program, season) change rarely
+DETAIL_REFRESH_INTERVAL = timedelta(minutes=30)
+# full payloads fetched per bulk poll, within the account burst beside the
+# login and room list; larger accounts get theirs spread over the next polls
+DETAILS_PER_POLL = 8
+
+CONF_BULK_REFRESH = "bulk_refresh"
+
+# seconds a write waits for newer values of the same setting before it is sent
+CONF_WRITE_DELAY = "write_delay"
+DEFAULT_WRITE_DELAY = 1.0
+
+# bounds of the adaptive poll interval, in seconds
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+DEFAULT_MIN_INTERVAL = timedelta(seconds=20)
+DEFAULT_MAX_INTERVAL = timedelta(minutes=10)
+
+# seconds setup waits for the cloud before HA retries the entry later
+STARTUP_TIMEOUT = 15
+
+# last-known state kept across restarts, ignored once older than STORE_TTL
+STORAGE_VERSION = 1
+STORE_TTL = timedelta(days=1)
+STORE_SAVE_DELAY = 30
+
+SERVICE_APPLY_PROFILE = "apply_profile"
+# rooms written at the same time by apply_profile
+PROFILE_PARALLEL_ROOMS = 4
+
+# requests per second and burst size allowed per account and for the whole cloud host
+ACCOUNT_RATE = 2.0
+ACCOUNT_BURST = 10
+HOST_RATE = 5.0
+HOST_BURST = 20
+# share of the poll interval by which each poll is shifted at random,
+# so accounts set up together drift apart instead of polling in lockstep
+POLL_JITTER = 0.1
@@ -0,0 +1,155 @@
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_WRITE_DELAY,
+    DOMAIN,
+    POLL_JITTER,
+)
+from .models import RoomState
+from .poller import AdaptiveInterval, RoomPoller
+from .runtime import RuntimeTracker
+from .writes import WriteQueue
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BesmartCoordinator(DataUpdateCoordinator):
+    """Polls every thermostat of one BeSmart account once per interval.
+
+    ``data`` maps each therId to its latest room payload, so all entities
+    of the account share a single fetch and a single login.
+    """
+
+    def __init__(
+        self,
+        hass,
+        besmart,
+        ther_ids,
+        room_names=None,
+        update_interval=DEFAULT_SCAN_INTERVAL,
+        bulk=True,
+        write_delay=DEFAULT_WRITE_DELAY,
+        min_interval=DEFAULT_MIN_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL,
+        store=None,
+    ):
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
+        self.besmart = besmart
+        self.poller = RoomPoller(besmart, ther_ids, bulk=bulk)
+        self.room_names = room_names or {}
+        self.writes = WriteQueue(write_delay)
+        self.adaptive = AdaptiveInterval(update_interval, min_interval, max_interval)
+        self.store = store
+        # therId -> (payload, RoomState) so a room's entities decode it once
+        self._states = {}
+        # therId -> boiler runtime counters, fed by every successful poll
+        self.runtime = {}
+        self.last_update_duration = None
+        self.last_success_time = None
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    @property
+    def ther_ids(self):
+        return self.poller.ther_ids
+
+    def room_state(self, ther_id):
+        """Decoded state of a room, shared by its entities until the next refresh."""
+        data = (self.data or {}).get(ther_id)
+        if data is None:
+            return None
+        cached = self._states.get(ther_id)
+        if cached is None or cached[0] is not data:
+            cached = self._states[ther_id] = (data, RoomState.from_payload(data))
+        return cached[1]
+
+    def expire_room(self, ther_id):
+        """Re-read the full payload of a room on the next refresh."""
+        self.poller.expire(ther_id)
+
+    def note_write(self):
+        """A write went out: poll fast for a while to confirm its effect."""
+        self.adaptive.note_write()
+
+    def snapshot(self):
+        """What a restart needs to show the rooms before the first poll."""
+        return {
+            "room_names": dict(self.room_names),
+            "rooms": dict(self.data or {}),
+            "meta": self.besmart.meta_snapshot(self.ther_ids),
+            "runtime": {ther_id: tracker.as_list() for ther_id, tracker in self.runtime.items()},
+        }
+
+    def restore(self, snapshot, age):
+        """Seed the poller and client caches from a snapshot ``age`` seconds old."""
+        self.besmart.restore_meta(snapshot.get("meta", {}))
+        self.poller.restore(snapshot.get("rooms", {}), age)
+        for ther_id, values in snapshot.get("runtime", {}).items():
+            try:
+                self.runtime.setdefault(ther_id, RuntimeTracker.from_list(values))
+            except (TypeError, ValueError):
+                _LOGGER.debug("Ignoring saved runtime of room %s: %s", ther_id, values)
+
+    async def async_shutdown(self):
+        self.writes.cancel()
+        if self.store is not None and self.data:
+            await self.store.async_save(self)
+        await super().async_shutdown()
+
+    async def _async_update_data(self):
+        start = time.monotonic()
+        data = await self.poller.async_poll()
+        self.last_update_duration = time.monotonic() - start
+
+        for ther_id in self.ther_ids:
+            if ther_id not in data:
+                _LOGGER.warning("⚠️ No valid data received for room: %s", ther_id)
+
+        if not data:
+            self.failures += 1
+            self.consecutive_failures += 1
+            raise UpdateFailed("No room data received from the BeSmart cloud")
+        self.consecutive_failures = 0
+        self.last_success_time = datetime.now()
+        self._track_runtime(data)
+        interval = self.adaptive.next_interval(data)
+        self.update_interval = timedelta(
+            seconds=interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        )
+        if self.store is not None:
+            self.store.async_delay_save(self)
+        return data
+
+    def _track_runtime(self, data):
+        now = dt_util.now()
+        for ther_id, payload in data.items():
+            room = RoomState.from_payload(payload)
+            # the entities reading this payload reuse the decoded state
+            self._states[ther_id] = (payload, room)
+            tracker = self.runtime.get(ther_id)
+            if tracker is None:
+                tracker = self.runtime[ther_id] = RuntimeTracker()
+            tracker.update(room.heating, room.temp_now, room.temp_out, now)
+
+    @property
+    def stats(self):
+        return {
+            "rooms": len(self.ther_ids),
+            "bulk_refresh": self.poller.bulk,
+            "update_interval": self.update_interval.total_seconds(),
+            "update_interval_reason": self.adaptive.reason,
+            "last_update_success": self.last_update_success,
+            "last_update_duration": self.last_update_duration,
+            "last_success_time": self.last_success_time.isoformat() if self.last_success_time else None,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
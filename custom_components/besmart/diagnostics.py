@@ -0,0 +1,32 @@
+from dataclasses import asdict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "coordinator": coordinator.stats,
+        "login": coordinator.besmart.login_stats,
+        "circuit": coordinator.besmart.breaker.stats,
+        "requests": coordinator.besmart.metrics.stats,
+        "reads": coordinator.besmart.reads.stats,
+        "rate_limit": {
+            "account": coordinator.besmart.limiter.stats if coordinator.besmart.limiter else None,
+            "host": coordinator.besmart.host_limiter.stats if coordinator.besmart.host_limiter else None,
+        },
+        "writes": coordinator.writes.stats,
+        "rooms": coordinator.data,
+        "settings": {
+            ther_id: asdict(settings)
+            for ther_id in coordinator.ther_ids
+            if (settings := coordinator.besmart.cached_settings(ther_id)) is not None
+        },
+    }
@@ -0,0 +1,43 @@
+from homeassistant.const import UnitOfTemperature
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+
+class BesmartRoomEntity(CoordinatorEntity):
+    """Base for the per-room entities reading the coordinator's room data.
+
+    They never call the cloud for reads: every value comes from the
+    payload the coordinator already fetched for the climate entity.
+    """
+
+    def __init__(self, coordinator, ther_id, room_name, description):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._ther_id = ther_id
+        self._attr_name = f"{room_name} {description.name}"
+        self._attr_unique_id = f"besmart_{ther_id}_{description.key}"
+
+    @property
+    def room(self):
+        return self.coordinator.room_state(self._ther_id)
+
+    @property
+    def available(self):
+        return super().available and self.room is not None
+
+    @property
+    def room_temperature_unit(self):
+        room = self.room
+        if room is None or room.celsius:
+            return UnitOfTemperature.CELSIUS
+        return UnitOfTemperature.FAHRENHEIT
+
+
+def room_entities(coordinator, entity_class, descriptions):
+    """One entity per room and description, named after the room."""
+    return [
+        entity_class(
+            coordinator, ther_id, coordinator.room_names.get(ther_id, f"BeSmart {ther_id}"), description
+        )
+        for ther_id in coordinator.ther_ids
+        for description in descriptions
+    ]
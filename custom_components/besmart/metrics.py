@@ -0,0 +1,131 @@
+import time
+from collections import deque
+
+# upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+class EndpointStats:
+    """Counters and a latency histogram for one BeSmart endpoint."""
+
+    __slots__ = (
+        "count", "errors", "timeouts", "bytes_sent", "bytes_received",
+        "total_time", "max_time", "buckets",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        # one slot per bucket plus one for slower requests
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, duration, outcome, sent, received):
+        self.count += 1
+        if outcome == ERROR:
+            self.errors += 1
+        elif outcome == TIMEOUT:
+            self.timeouts += 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        index = next(
+            (i for i, bound in enumerate(LATENCY_BUCKETS) if duration <= bound), len(LATENCY_BUCKETS)
+        )
+        self.buckets[index] += 1
+
+    def percentile(self, share):
+        """Upper bound of the bucket holding the given share of requests, None if unbounded."""
+        if not self.count:
+            return None
+        wanted = share * self.count
+        seen = 0
+        for bound, hits in zip(LATENCY_BUCKETS, self.buckets):
+            seen += hits
+            if seen >= wanted:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "mean_latency": self.total_time / self.count if self.count else None,
+            "max_latency": self.max_time,
+            "p50_latency": self.percentile(0.5),
+            "p95_latency": self.percentile(0.95),
+            "histogram": dict(zip([*map(str, LATENCY_BUCKETS), "inf"], self.buckets)),
+        }
+
+
+class ClientMetrics:
+    """Per-endpoint request metrics of one Besmart client.
+
+    Every HTTP attempt is recorded, retries included. ``span_hook`` is an
+    optional callable receiving ``(endpoint, start, duration, outcome)``
+    for each attempt, to feed an external tracer.
+    """
+
+    def __init__(self, clock=time.monotonic, span_hook=None):
+        self._clock = clock
+        self.span_hook = span_hook
+        self.endpoints = {}
+        self._logins = deque()
+
+    @staticmethod
+    def endpoint(path):
+        """Endpoint name of a request path, without its query string."""
+        return path.split("?", 1)[0].rsplit("/", 1)[-1]
+
+    def record(self, path, start, duration, outcome, sent=0, received=0):
+        name = self.endpoint(path)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        stats.record(duration, outcome, sent, received)
+        if self.span_hook is not None:
+            self.span_hook(name, start, duration, outcome)
+
+    def record_login(self):
+        self._logins.append(self._clock())
+
+    @property
+    def logins_last_hour(self):
+        cutoff = self._clock() - 3600
+        while self._logins and self._logins[0] < cutoff:
+            self._logins.popleft()
+        return len(self._logins)
+
+    @property
+    def totals(self):
+        endpoints = self.endpoints.values()
+        count = sum(s.count for s in endpoints)
+        total_time = sum(s.total_time for s in endpoints)
+        return {
+            "requests": count,
+            "errors": sum(s.errors for s in endpoints),
+            "timeouts": sum(s.timeouts for s in endpoints),
+            "bytes_sent": sum(s.bytes_sent for s in endpoints),
+            "bytes_received": sum(s.bytes_received for s in endpoints),
+            "mean_latency": total_time / count if count else None,
+            "logins_last_hour": self.logins_last_hour,
+        }
+
+    @property
+    def stats(self):
+        return {
+            "totals": self.totals,
+            "endpoints": {name: s.as_dict() for name, s in sorted(self.endpoints.items())},
+        }
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+
+from .resilience import InvalidSetpointError
+
+# tempUnit values of a room reporting in Celsius; anything else is Fahrenheit
+CELSIUS_UNITS = frozenset({"0", "N/A"})
+# room setpoints (frost, eco, comfort) a thermostat accepts, in Celsius; the
+# minTempSetPoint/maxTempSetPoint settings are boiler flow limits, not these
+SETPOINT_MIN = 2.0
+SETPOINT_MAX = 35.0
+
+
+def parse_float(value, fallback=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return fallback
+
+
+def encode_setpoint(value):
+    """Split a temperature into the integer and tenths strings the cloud expects."""
+    whole, tenths = f"{round(float(value), 1):.1f}".split(".")
+    return whole, tenths
+
+
+def to_celsius(value, temp_unit):
+    """A temperature shown in the room's unit, converted to the Celsius the cloud stores."""
+    if temp_unit in CELSIUS_UNITS:
+        return round(value, 1)
+    return round((value - 32.0) / 1.8, 1)
+
+
+def setpoint_range(temp_unit):
+    """Lowest and highest setpoint of a room, in the room's unit."""
+    if temp_unit in CELSIUS_UNITS:
+        return SETPOINT_MIN, SETPOINT_MAX
+    return round(SETPOINT_MIN * 1.8 + 32, 1), round(SETPOINT_MAX * 1.8 + 32, 1)
+
+
+def check_setpoint(value, temp_unit):
+    """Return ``value`` as a float, raising InvalidSetpointError if the room would refuse it."""
+    low, high = setpoint_range(temp_unit)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise InvalidSetpointError(f"Setpoint {value!r} is not a number") from None
+    if not low <= round(value, 1) <= high:
+        unit = "°C" if temp_unit in CELSIUS_UNITS else "°F"
+        raise InvalidSetpointError(f"Setpoint {value}{unit} is outside {low}-{high}{unit}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class RoomState:
+    """One decoded room payload of getRoomList/getRoomData196."""
+
+    ther_id: str | None
+    room_mark: str | None
+    # None when the payload has no usable reading, rather than a made-up value
+    temp_now: float | None
+    temp_out: float | None
+    comfort: float
+    eco: float
+    frost: float
+    mode: int
+    season: str
+    heating: bool
+    battery_ok: bool
+    temp_unit: str
+    program: tuple | None
+
+    @classmethod
+    def from_payload(cls, data):
+        """Decode a room payload, falling back to defaults for missing or garbled fields."""
+        try:
+            battery_ok = not int(data.get("bat", "0"))
+        except (TypeError, ValueError):
+            battery_ok = False
+        try:
+            mode = int(data.get("mode", "2"))
+        except (TypeError, ValueError):
+            mode = 2
+        program = data.get("programWeek")
+        return cls(
+            ther_id=None if data.get("therId") is None else str(data["therId"]),
+            room_mark=data.get("roomMark"),
+            temp_now=parse_float(data.get("tempNow")),
+            temp_out=parse_float(data.get("tempOut")),
+            comfort=parse_float(data.get("comfT"), 20.0),
+            eco=parse_float(data.get("saveT"), 16.0),
+            frost=parse_float(data.get("frostT"), 5.0),
+            mode=mode,
+            season=data.get("season", "1"),
+            heating=data.get("heating") == "1",
+            battery_ok=battery_ok,
+            temp_unit=data.get("tempUnit", "0"),
+            program=tuple(program) if isinstance(program, list) else None,
+        )
+
+    @property
+    def celsius(self):
+        return self.temp_unit in CELSIUS_UNITS
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSettings:
+    """Boiler settings of a room, as read by getSetting.php."""
+
+    min_setpoint: float
+    max_setpoint: float
+    temp_curve: float
+    sensor_influence: str
+    unit: str
+    season: str
+    boiler_online: str
+
+    @classmethod
+    def from_payload(cls, data):
+        """Decode a getSetting.php answer, None unless it reports success."""
+        if not isinstance(data, dict) or data.get("error") != 0:
+            return None
+        return cls(
+            min_setpoint=parse_float(data.get("minTempSetPoint"), 30.0),
+            max_setpoint=parse_float(data.get("maxTempSetPoint"), 30.0),
+            temp_curve=parse_float(data.get("tempCurver"), 0.0),
+            sensor_influence=data.get("sensorInfluence", "0"),
+            unit=data.get("unit", "0"),
+            season=data.get("season", "1"),
+            boiler_online=data.get("boilerIsOnline", "0"),
+        )
+
+    def to_payload(self):
+        """These settings as a getSetting.php answer, the form they are cached in."""
+        return {
+            "error": 0,
+            "minTempSetPoint": f"{self.min_setpoint:.1f}",
+            "maxTempSetPoint": f"{self.max_setpoint:.1f}",
+            "tempCurver": f"{self.temp_curve:.1f}",
+            "sensorInfluence": self.sensor_influence,
+            "unit": self.unit,
+            "season": self.season,
+            "boilerIsOnline": self.boiler_online,
+        }
+
+    def to_form(self, season=None):
+        """The setSetting.php fields writing these settings back, with an optional new season."""
+        min_ip, min_fp = encode_setpoint(self.min_setpoint)
+        max_ip, max_fp = encode_setpoint(self.max_setpoint)
+        curve_ip, curve_fp = encode_setpoint(self.temp_curve)
+        return {
+            "minTempSetPointIP": min_ip,
+            "minTempSetPointFP": min_fp,
+            "maxTempSetPointIP": max_ip,
+            "maxTempSetPointFP": max_fp,
+            "sensorInfluence": self.sensor_influence,
+            "tempCurveIP": curve_ip,
+            "tempCurveFP": curve_fp,
+            "unit": self.unit,
+            "season": self.season if season is None else season,
+            "boilerIsOnline": self.boiler_online,
+        }
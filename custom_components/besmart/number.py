@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from homeassistant.components.number import (
+    NumberDeviceClass,
+    NumberEntity,
+    NumberEntityDescription,
+    NumberMode,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+
+from .const import DOMAIN
+from .entity import BesmartRoomEntity, room_entities
+from .models import check_setpoint, setpoint_range
+from .resilience import BesmartError, InvalidSetpointError
+
+
+@dataclass(frozen=True, kw_only=True)
+class BesmartSetpointDescription(NumberEntityDescription):
+    """A setpoint of a room with the client method writing it.
+
+    ``kind`` matches the write kind of the climate entity, so writes from
+    both coalesce in the coordinator's write queue.
+    """
+
+    kind: str
+    value_fn: Callable[[object], float]
+    setter: str
+
+
+SETPOINTS = (
+    BesmartSetpointDescription(
+        key="frost_temperature",
+        name="Frost temperature",
+        kind="frost",
+        value_fn=lambda room: room.frost,
+        setter="setRoomFrostTemp",
+    ),
+    BesmartSetpointDescription(
+        key="eco_temperature",
+        name="Eco temperature",
+        kind="eco",
+        value_fn=lambda room: room.eco,
+        setter="setRoomECOTemp",
+    ),
+    BesmartSetpointDescription(
+        key="comfort_temperature",
+        name="Comfort temperature",
+        kind="comfort",
+        value_fn=lambda room: room.comfort,
+        setter="setRoomConfortTemp",
+    ),
+)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the frost, eco and comfort setpoints of every thermostat."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(room_entities(coordinator, BesmartSetpoint, SETPOINTS))
+
+
+class BesmartSetpoint(BesmartRoomEntity, NumberEntity):
+    """A room setpoint, written through the coordinator's write queue."""
+
+    _attr_device_class = NumberDeviceClass.TEMPERATURE
+    _attr_mode = NumberMode.BOX
+    _attr_native_step = 0.1
+
+    @property
+    def native_unit_of_measurement(self):
+        return self.room_temperature_unit
+
+    @property
+    def _temp_unit(self):
+        room = self.room
+        return "0" if room is None else room.temp_unit
+
+    @property
+    def native_min_value(self):
+        return setpoint_range(self._temp_unit)[0]
+
+    @property
+    def native_max_value(self):
+        return setpoint_range(self._temp_unit)[1]
+
+    @property
+    def native_value(self):
+        room = self.room
+        return None if room is None else self.entity_description.value_fn(room)
+
+    async def async_set_native_value(self, value):
+        try:
+            value = check_setpoint(value, self._temp_unit)
+        except InvalidSetpointError as ex:
+            raise ServiceValidationError(f"Could not set {self.name}: {ex}") from ex
+        current = self.native_value
+        if current is not None and abs(current - value) < 0.05:
+            # the device already has it: no write, no refresh
+            return
+        description = self.entity_description
+        write = getattr(self.coordinator.besmart, description.setter)
+        try:
+            result = await self.coordinator.writes.submit(
+                self._ther_id, description.kind, value, partial(write, self._ther_id)
+            )
+        except BesmartError as ex:
+            raise HomeAssistantError(f"Could not set {self.name}: {ex}") from ex
+        if not result:
+            raise HomeAssistantError(f"The BeSmart cloud rejected {self.name} = {value}")
+        self.coordinator.note_write()
+        await self.coordinator.async_request_refresh()
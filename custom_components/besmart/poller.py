@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+
+from .const import DETAIL_REFRESH_INTERVAL, DETAILS_PER_POLL
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fields getRoomList.php already carries for every room; anything else
+# (programWeek, season, tempOut, ...) comes from the slower per-room
+# getRoomData196 call, so in bulk mode it is only as fresh as the last
+# detail fetch (DETAIL_REFRESH_INTERVAL)
+LIST_FIELDS = ("tempNow", "comfT", "saveT", "frostT", "mode", "heating", "tempUnit", "roomMark")
+
+
+class RoomPoller:
+    """Fetches room data for a set of therIds.
+
+    In bulk mode one getRoomList.php call refreshes the common fields of
+    every room, and getRoomData196.php is only called per room when its
+    detail payload is missing or older than ``detail_interval``. At most
+    ``max_details`` listed rooms are fetched in full per poll, missing and
+    oldest first, so large accounts spread them over several polls instead
+    of bursting past the rate limit; until then a room is served from its
+    list fields.
+    """
+
+    def __init__(
+        self,
+        besmart,
+        ther_ids,
+        bulk=True,
+        detail_interval=DETAIL_REFRESH_INTERVAL,
+        max_details=DETAILS_PER_POLL,
+    ):
+        self.besmart = besmart
+        self.ther_ids = list(ther_ids)
+        self.bulk = bulk
+        self._max_details = max_details
+        self._detail_interval = detail_interval.total_seconds()
+        self._details = {}
+        self._detail_time = {}
+
+    def last_known(self):
+        """Room payloads the client already holds, to show before the first poll."""
+        listed = {
+            str(room.get("therId")): room for room in (self.besmart.cached_rooms or {}).values()
+        }
+        data = {}
+        for ther_id in self.ther_ids:
+            room = dict(self._details.get(ther_id, {}))
+            if ther_id in listed:
+                room.update(
+                    (key, listed[ther_id][key]) for key in LIST_FIELDS if key in listed[ther_id]
+                )
+            if room:
+                data[ther_id] = room
+        return data
+
+    def restore(self, rooms, age):
+        """Seed room payloads saved ``age`` seconds ago; they are re-read once due."""
+        fetched = time.monotonic() - age
+        for ther_id, room in rooms.items():
+            if ther_id in self.ther_ids and ther_id not in self._details:
+                self._details[ther_id] = room
+                self._detail_time[ther_id] = fetched
+
+    def expire(self, ther_id):
+        """Fetch the full payload of a room on the next poll, e.g. after a write."""
+        self._detail_time.pop(ther_id, None)
+
+    def _detail_due(self, ther_id, now):
+        fetched = self._detail_time.get(ther_id)
+        return fetched is None or now - fetched >= self._detail_interval
+
+    async def _fetch_details(self, ther_ids):
+        results = await asyncio.gather(
+            *(self.besmart.roomByTherId(ther_id) for ther_id in ther_ids)
+        )
+        now = time.monotonic()
+        fetched = set()
+        for ther_id, room in zip(ther_ids, results):
+            if room and room.get("error") == 0:
+                self._details[ther_id] = room
+                self._detail_time[ther_id] = now
+                fetched.add(ther_id)
+        return fetched
+
+    async def async_poll(self):
+        """Return the latest payload of every room that could be fetched."""
+        listed = {}
+        if self.bulk:
+            rooms = await self.besmart.rooms()
+            listed = {str(r.get("therId")): r for r in (rooms or {}).values()}
+
+        now = time.monotonic()
+        # rooms missing from the list have no other source and cannot wait
+        due = [ther_id for ther_id in self.ther_ids if ther_id not in listed]
+        stale = sorted(
+            (t for t in self.ther_ids if t in listed and self._detail_due(t, now)),
+            key=lambda t: self._detail_time.get(t, float("-inf")),
+        )
+        due += stale[:max(self._max_details - len(due), 0)]
+        fetched = set()
+        if due:
+            _LOGGER.debug("Fetching full room data for: %s", due)
+            fetched = await self._fetch_details(due)
+
+        data = {}
+        for ther_id in self.ther_ids:
+            detail = self._details.get(ther_id)
+            if ther_id not in listed and (detail is None or ther_id not in fetched):
+                continue
+            room = dict(detail or {})
+            if ther_id in listed:
+                room.update(
+                    (key, listed[ther_id][key]) for key in LIST_FIELDS if key in listed[ther_id]
+                )
+            data[ther_id] = room
+        return data
+
+
+class AdaptiveInterval:
+    """Chooses the next poll interval from what the rooms are doing.
+
+    Polls run at ``min_interval`` for a few cycles after a write and while
+    a room is heating, and at ``max_interval`` while every room is off.
+    Otherwise they start at ``base_interval`` and the interval doubles each
+    time ``STABLE_POLLS`` polls in a row returned the same values.
+    """
+
+    FAST_POLLS_AFTER_WRITE = 3
+    STABLE_POLLS = 3
+    # a change in any of these means something is happening in the room
+    WATCHED_FIELDS = ("tempNow", "heating", "mode", "season", "comfT", "saveT", "frostT")
+
+    def __init__(self, base_interval, min_interval, max_interval):
+        self._min = min_interval.total_seconds()
+        self._max = max(max_interval.total_seconds(), self._min)
+        self._base = min(max(base_interval.total_seconds(), self._min), self._max)
+        self._fast_polls = 0
+        self._stable_polls = 0
+        self._last = None
+        self.reason = "base"
+
+    def note_write(self):
+        """Poll fast for the next few cycles to pick up the effect of a write."""
+        self._fast_polls = self.FAST_POLLS_AFTER_WRITE
+
+    @staticmethod
+    def _is_off(room):
+        return room.get("season") == "0" or room.get("mode") == "5"
+
+    def next_interval(self, data):
+        """Return the number of seconds to wait before the next poll."""
+        snapshot = {
+            ther_id: tuple(room.get(field) for field in self.WATCHED_FIELDS)
+            for ther_id, room in data.items()
+        }
+        self._stable_polls = self._stable_polls + 1 if snapshot == self._last else 0
+        self._last = snapshot
+
+        if self._fast_polls:
+            self._fast_polls -= 1
+            self.reason = "write"
+            return self._min
+        if any(room.get("heating") == "1" and not self._is_off(room) for room in data.values()):
+            self.reason = "heating"
+            return self._min
+        if data and all(self._is_off(room) for room in data.values()):
+            self.reason = "off"
+            return self._max
+        backoff = self._stable_polls // self.STABLE_POLLS
+        self.reason = "stable" if backoff else "base"
+        return min(self._base * 2 ** backoff, self._max)
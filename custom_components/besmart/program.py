@@ -0,0 +1,70 @@
+from array import array
+from datetime import timedelta
+
+SLOTS_PER_DAY = 48
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+SLOT_LENGTH = timedelta(minutes=30)
+# mark used when the program is missing or too short: comfort
+DEFAULT_MARK = "2"
+
+
+class WeekProgram:
+    """Precomputed weekly program of a room.
+
+    ``programWeek`` holds one string of 48 half-hour marks per day, Sunday
+    first. The marks are flattened into a 7×48 byte array, and for every
+    slot the distance to the next slot with a different mark is stored
+    too, so the current mark and the next transition are O(1) lookups.
+    """
+
+    __slots__ = ("source", "_marks", "_next")
+
+    def __init__(self, program_week):
+        self.source = program_week
+        marks = bytearray()
+        for day in list(program_week or [])[:7]:
+            day = "".join(str(mark) for mark in day)[:SLOTS_PER_DAY]
+            marks += day.ljust(SLOTS_PER_DAY, DEFAULT_MARK).encode()
+        self._marks = bytes(marks.ljust(SLOTS_PER_WEEK, DEFAULT_MARK.encode()))
+        self._next = self._transitions(self._marks)
+
+    @staticmethod
+    def _transitions(marks):
+        """Slots from each slot to the next different mark, 0 if the week is flat."""
+        distances = array("H", [0] * SLOTS_PER_WEEK)
+        if len(set(marks)) == 1:
+            return distances
+        # walk the week backwards twice so the search wraps from Saturday to Sunday
+        distance = 0
+        for i in range(2 * SLOTS_PER_WEEK - 1, -1, -1):
+            slot = i % SLOTS_PER_WEEK
+            following = (slot + 1) % SLOTS_PER_WEEK
+            distance = 1 if marks[following] != marks[slot] else distance + 1
+            distances[slot] = distance
+        return distances
+
+    @classmethod
+    def update(cls, current, program_week):
+        """Return ``current`` if the program did not change, a rebuilt one otherwise."""
+        if current is not None and (
+            current.source is program_week or current.source == program_week
+        ):
+            return current
+        return cls(program_week)
+
+    @staticmethod
+    def slot(when):
+        """Index of the half-hour slot ``when`` falls in."""
+        return (when.isoweekday() % 7) * SLOTS_PER_DAY + when.hour * 2 + when.minute // 30
+
+    def mark_at(self, when):
+        """Program mark ("0"-"3") in force at ``when``."""
+        return chr(self._marks[self.slot(when)])
+
+    def next_change(self, when):
+        """Start of the next slot with a different mark, None if the program is flat."""
+        distance = self._next[self.slot(when)]
+        if not distance:
+            return None
+        slot_start = when.replace(minute=when.minute // 30 * 30, second=0, microsecond=0)
+        return slot_start + distance * SLOT_LENGTH
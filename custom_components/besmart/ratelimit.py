@@ -0,0 +1,91 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+# lower goes first: user writes (and the logins they need) overtake polls
+WRITE = 0
+POLL = 1
+
+
+class TokenBucket:
+    """Token-bucket rate limiter with a priority queue of waiters.
+
+    Up to ``burst`` requests go out at once, then ``rate`` per second.
+    Waiting requests are released in priority order, FIFO within a
+    priority, so a queued write never waits behind a backlog of polls.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=asyncio.sleep):
+        self._rate = float(rate)
+        self._burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self._burst)
+        self._updated = clock()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._dispatcher = None
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queue_depth = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    @property
+    def queue_depth(self):
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority=POLL):
+        """Wait until a request may go out."""
+        start = self._clock()
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            self.acquired += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+        wait = self._clock() - start
+        self.acquired += 1
+        self.waited += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    async def _dispatch(self):
+        try:
+            while self._waiters:
+                self._refill()
+                while self._waiters and self._tokens >= 1:
+                    _, _, future = heapq.heappop(self._waiters)
+                    if future.done():
+                        # the caller gave up waiting
+                        continue
+                    self._tokens -= 1
+                    future.set_result(None)
+                if self._waiters:
+                    await self._sleep((1 - self._tokens) / self._rate)
+        finally:
+            self._dispatcher = None
+
+    @property
+    def stats(self):
+        return {
+            "rate": self._rate,
+            "burst": self._burst,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "mean_wait": self.total_wait / self.waited if self.waited else None,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,99 @@
+import random
+import time
+
+
+class BesmartError(Exception):
+    """Base class for BeSmart client errors."""
+
+
+class BesmartConnectionError(BesmartError):
+    """The BeSmart cloud could not be reached or answered with a server error."""
+
+
+class CircuitOpenError(BesmartConnectionError):
+    """Calls fail fast because the BeSmart cloud is considered unhealthy."""
+
+
+class InvalidSetpointError(BesmartError, ValueError):
+    """A setpoint was refused before sending, being outside what a room accepts."""
+
+
+class RetryPolicy:
+    """Bounded retries with exponential backoff and full jitter."""
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=5.0, rng=random.random):
+        self.attempts = max(1, attempts)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._rng = rng
+
+    def delay(self, attempt):
+        """Seconds to wait before retrying after the given (0-based) attempt."""
+        return self._rng() * min(self._max_delay, self._base_delay * 2 ** attempt)
+
+
+class CircuitBreaker:
+    """Opens after repeated failures and lets a single probe through after a cool-down.
+
+    While open every call fails at once instead of waiting out timeouts
+    against a cloud that is down.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock=time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self._reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a call may go out now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Give the probe back when the probing call ended without an outcome, e.g. cancelled."""
+        self._probing = False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._probing or self._failures >= self._failure_threshold:
+            if self._opened_at is None or self._probing:
+                self.times_opened += 1
+            self._opened_at = self._clock()
+            self._probing = False
+
+    @property
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
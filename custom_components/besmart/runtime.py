@@ -0,0 +1,128 @@
+from collections import deque
+from datetime import datetime, time, timedelta
+
+# longer gaps between polls (restarts, outages) are not counted as known state
+MAX_GAP = timedelta(minutes=30)
+HOUR = 3600.0
+
+
+class RuntimeTracker:
+    """Boiler runtime of one room, built from the heating flag of each poll.
+
+    The time between two polls is booked to the state seen at the first
+    of them. Counters roll over at local midnight (today) and on Mondays
+    (week); ``total_hours``, ``total_cycles`` and ``degree_hours`` only
+    grow. Degree-hours integrate the indoor/outdoor difference
+    (tempNow - tempOut) while heating, a proxy for the heat delivered;
+    time with either temperature unknown adds no degree-hours.
+    """
+
+    __slots__ = (
+        "day", "week", "today", "week_seconds", "total", "cycles_today", "total_cycles",
+        "degree_hours", "last_time", "last_heating", "last_delta", "_starts",
+    )
+
+    def __init__(self):
+        self.day = None
+        self.week = None
+        self.today = 0.0
+        self.week_seconds = 0.0
+        self.total = 0.0
+        self.cycles_today = 0
+        self.total_cycles = 0
+        self.degree_hours = 0.0
+        self.last_time = None
+        self.last_heating = None
+        self.last_delta = None
+        # start times of the burner cycles of the last hour
+        self._starts = deque()
+
+    @staticmethod
+    def _week(when):
+        year, week, _ = when.isocalendar()
+        return year * 100 + week
+
+    def _roll(self, when):
+        day = when.date().toordinal()
+        if day != self.day:
+            self.day = day
+            self.today = 0.0
+            self.cycles_today = 0
+        week = self._week(when)
+        if week != self.week:
+            self.week = week
+            self.week_seconds = 0.0
+
+    def _book(self, start, end):
+        """Add heating time from ``start`` to ``end``, split at local midnights."""
+        while start < end:
+            self._roll(start)
+            midnight = datetime.combine(
+                start.date() + timedelta(days=1), time(), tzinfo=start.tzinfo
+            )
+            stop = min(end, midnight)
+            seconds = (stop - start).total_seconds()
+            self.today += seconds
+            self.week_seconds += seconds
+            self.total += seconds
+            if self.last_delta is not None:
+                self.degree_hours += max(self.last_delta, 0.0) * seconds / HOUR
+            start = stop
+
+    def update(self, heating, temp_now, temp_out, when):
+        """Record the heating flag and temperatures of a poll taken at ``when``."""
+        last = self.last_time
+        if last is not None and self.last_heating and timedelta(0) < when - last <= MAX_GAP:
+            self._book(last, when)
+        self._roll(when)
+        if heating and self.last_heating is False:
+            self.cycles_today += 1
+            self.total_cycles += 1
+            self._starts.append(when)
+        while self._starts and when - self._starts[0] > timedelta(hours=1):
+            self._starts.popleft()
+        self.last_time = when
+        self.last_heating = heating
+        self.last_delta = (
+            None if temp_now is None or temp_out is None else temp_now - temp_out
+        )
+
+    @property
+    def today_hours(self):
+        return self.today / HOUR
+
+    @property
+    def week_hours(self):
+        return self.week_seconds / HOUR
+
+    @property
+    def total_hours(self):
+        return self.total / HOUR
+
+    @property
+    def cycles_last_hour(self):
+        return len(self._starts)
+
+    def duty_cycle(self, when):
+        """Share of today, in percent, the boiler has been heating."""
+        midnight = datetime.combine(when.date(), time(), tzinfo=when.tzinfo)
+        elapsed = (when - midnight).total_seconds()
+        if self.day != when.date().toordinal() or elapsed <= 0:
+            return 0.0
+        return min(100.0, 100.0 * self.today / elapsed)
+
+    def as_list(self):
+        """Compact form for the store."""
+        return [
+            self.day, self.week, round(self.today), round(self.week_seconds), round(self.total),
+            self.cycles_today, self.total_cycles, round(self.degree_hours, 3),
+        ]
+
+    @classmethod
+    def from_list(cls, values):
+        tracker = cls()
+        (
+            tracker.day, tracker.week, tracker.today, tracker.week_seconds, tracker.total,
+            tracker.cycles_today, tracker.total_cycles, tracker.degree_hours,
+        ) = values
+        return tracker
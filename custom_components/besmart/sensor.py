@@ -0,0 +1,201 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .entity import BesmartRoomEntity, room_entities
+
+
+@dataclass(frozen=True, kw_only=True)
+class BesmartRoomSensorDescription(SensorEntityDescription):
+    """A temperature of a room, read from its decoded ``RoomState``.
+
+    A reading missing from the payload is reported as unknown. The outdoor
+    temperature is not in the room list, so with bulk refresh it follows
+    the per-room detail fetch (every 30 minutes) rather than every poll.
+    """
+
+    value_fn: Callable[[object], float | None]
+
+
+ROOM_SENSORS = (
+    BesmartRoomSensorDescription(
+        key="outdoor_temperature",
+        name="Outdoor temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda room: room.temp_out,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class BesmartRuntimeDescription(SensorEntityDescription):
+    """A boiler runtime counter of a room, read from its ``RuntimeTracker``."""
+
+    value_fn: Callable[[object, object], float | int]
+
+
+# counters that only grow (or reset at midnight) are compiled into
+# long-term statistics by the recorder, so dashboards need no history queries
+RUNTIME_SENSORS = (
+    BesmartRuntimeDescription(
+        key="heating_today",
+        name="Heating today",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+        value_fn=lambda tracker, now: round(tracker.today_hours, 3),
+    ),
+    BesmartRuntimeDescription(
+        key="heating_week",
+        name="Heating this week",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=lambda tracker, now: round(tracker.week_hours, 3),
+    ),
+    BesmartRuntimeDescription(
+        key="duty_cycle",
+        name="Heating duty cycle",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda tracker, now: round(tracker.duty_cycle(now), 1),
+    ),
+    BesmartRuntimeDescription(
+        key="heating_cycles",
+        name="Heating cycles last hour",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda tracker, now: tracker.cycles_last_hour,
+    ),
+    BesmartRuntimeDescription(
+        key="degree_hours",
+        name="Heating degree-hours",
+        native_unit_of_measurement="K·h",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=lambda tracker, now: round(tracker.degree_hours, 2),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class BesmartMetricDescription(SensorEntityDescription):
+    """A client metric of the account, read from ``ClientMetrics.totals``."""
+
+    value_fn: Callable[[dict], float | int | None]
+
+
+def _mean_latency_ms(totals):
+    latency = totals["mean_latency"]
+    return None if latency is None else round(latency * 1000, 1)
+
+
+METRIC_SENSORS = (
+    BesmartMetricDescription(
+        key="requests",
+        name="BeSmart requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda totals: totals["requests"],
+    ),
+    BesmartMetricDescription(
+        key="request_errors",
+        name="BeSmart request errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda totals: totals["errors"] + totals["timeouts"],
+    ),
+    BesmartMetricDescription(
+        key="mean_latency",
+        name="BeSmart mean latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_mean_latency_ms,
+    ),
+    BesmartMetricDescription(
+        key="logins_last_hour",
+        name="BeSmart logins last hour",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda totals: totals["logins_last_hour"],
+    ),
+    BesmartMetricDescription(
+        key="bytes_received",
+        name="BeSmart data received",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda totals: totals["bytes_received"],
+    ),
+)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the room sensors and the client metric sensors of an account."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(room_entities(coordinator, BesmartRoomSensor, ROOM_SENSORS))
+    async_add_entities(room_entities(coordinator, BesmartRuntimeSensor, RUNTIME_SENSORS))
+    async_add_entities(
+        BesmartMetricSensor(coordinator, entry.entry_id, description)
+        for description in METRIC_SENSORS
+    )
+
+
+class BesmartRoomSensor(BesmartRoomEntity, SensorEntity):
+    """A temperature reported in a room's payload."""
+
+    @property
+    def native_unit_of_measurement(self):
+        return self.room_temperature_unit
+
+    @property
+    def native_value(self):
+        room = self.room
+        return None if room is None else self.entity_description.value_fn(room)
+
+
+class BesmartRuntimeSensor(BesmartRoomEntity, SensorEntity):
+    """Boiler runtime statistics of a room, tracked from its heating flag."""
+
+    @property
+    def available(self):
+        return self._ther_id in self.coordinator.runtime
+
+    @property
+    def native_value(self):
+        tracker = self.coordinator.runtime.get(self._ther_id)
+        if tracker is None:
+            return None
+        return self.entity_description.value_fn(tracker, dt_util.now())
+
+
+class BesmartMetricSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor exposing one request metric of the BeSmart client."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, entry_id, description):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"besmart_{entry_id}_{description.key}"
+
+    @property
+    def available(self):
+        # the metrics describe failed polls too
+        return True
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator.besmart.metrics.totals)
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from functools import partial
+
+import voluptuous as vol
+
+from homeassistant.core import ServiceCall, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DATA_CLIENTS, DOMAIN, PROFILE_PARALLEL_ROOMS, SERVICE_APPLY_PROFILE
+from .coordinator import BesmartCoordinator
+from .models import check_setpoint
+from .resilience import BesmartError, InvalidSetpointError
+
+_LOGGER = logging.getLogger(__name__)
+
+PRESETS = {"comfort": "2", "eco": "1", "frost": "0"}
+SEASONS = {"heat": "1", "off": "0"}
+
+# target field -> (write kind, client method, value encoder), in the order they are sent;
+# the kinds match the entities' so their pending writes coalesce with the profile
+TARGETS = {
+    "hvac_mode": ("season", "setSettings", SEASONS.get),
+    "preset_mode": ("mode", "setRoomMode", PRESETS.get),
+    "frost_temperature": ("frost", "setRoomFrostTemp", float),
+    "eco_temperature": ("eco", "setRoomECOTemp", float),
+    "comfort_temperature": ("comfort", "setRoomConfortTemp", float),
+}
+
+ROOM_SCHEMA = vol.Schema(
+    {
+        vol.Required("ther_id"): cv.string,
+        vol.Optional("hvac_mode"): vol.In(list(SEASONS)),
+        vol.Optional("preset_mode"): vol.In(list(PRESETS)),
+        vol.Optional("frost_temperature"): vol.Coerce(float),
+        vol.Optional("eco_temperature"): vol.Coerce(float),
+        vol.Optional("comfort_temperature"): vol.Coerce(float),
+    }
+)
+
+APPLY_PROFILE_SCHEMA = vol.Schema(
+    {vol.Required("rooms"): vol.All(cv.ensure_list, [ROOM_SCHEMA])}
+)
+
+
+def _coordinators(hass):
+    return [
+        value for key, value in hass.data.get(DOMAIN, {}).items()
+        if key != DATA_CLIENTS and isinstance(value, BesmartCoordinator)
+    ]
+
+
+async def _limited(limit, write, value):
+    async with limit:
+        return await write(value)
+
+
+async def _apply_room(coordinator, room, limit):
+    """Queue every target of one room at once, so they go out as one batch.
+
+    ``limit`` only bounds the requests themselves: every room waits out the
+    write queue's delay at the same time.
+    """
+    ther_id = room["ther_id"]
+    targets = [(field, room[field]) for field in TARGETS if field in room]
+    results = await asyncio.gather(
+        *(
+            coordinator.writes.submit(
+                ther_id,
+                TARGETS[field][0],
+                TARGETS[field][2](value),
+                partial(
+                    _limited, limit, partial(getattr(coordinator.besmart, TARGETS[field][1]), ther_id)
+                ),
+            )
+            for field, value in targets
+        ),
+        return_exceptions=True,
+    )
+    outcome = {}
+    for (field, _), result in zip(targets, results):
+        if isinstance(result, BesmartError):
+            _LOGGER.warning("Profile %s for room %s failed: %s", field, ther_id, result)
+            result = None
+        elif isinstance(result, BaseException):
+            raise result
+        outcome[field] = bool(result)
+    if "hvac_mode" in room:
+        coordinator.expire_room(ther_id)
+    return outcome
+
+
+async def async_apply_profile(hass, rooms, parallel=PROFILE_PARALLEL_ROOMS):
+    """Write the targets of many rooms concurrently and return per-room results.
+
+    Unknown rooms and out-of-range setpoints are refused before anything
+    is sent. Rooms are grouped by account, each account logs in at most
+    once, and at most ``parallel`` writes are sent at the same time.
+    """
+    owners = {}
+    for coordinator in _coordinators(hass):
+        for ther_id in coordinator.ther_ids:
+            owners[ther_id] = coordinator
+    unknown = [room["ther_id"] for room in rooms if room["ther_id"] not in owners]
+    if unknown:
+        raise ServiceValidationError(f"Unknown BeSmart thermostats: {', '.join(unknown)}")
+    # setpoints are checked in the unit of each room before anything is sent
+    for room in rooms:
+        state = owners[room["ther_id"]].room_state(room["ther_id"])
+        unit = "0" if state is None else state.temp_unit
+        for field in ("frost_temperature", "eco_temperature", "comfort_temperature"):
+            if field in room:
+                try:
+                    check_setpoint(room[field], unit)
+                except InvalidSetpointError as ex:
+                    raise ServiceValidationError(
+                        f"Thermostat {room['ther_id']} {field}: {ex}"
+                    ) from ex
+
+    used = {id(owners[room["ther_id"]]): owners[room["ther_id"]] for room in rooms}
+    clients = {id(c.besmart): c.besmart for c in used.values()}
+    await asyncio.gather(*(client.ensure_login() for client in clients.values()))
+
+    limit = asyncio.Semaphore(parallel)
+    results = await asyncio.gather(
+        *(_apply_room(owners[room["ther_id"]], room, limit) for room in rooms)
+    )
+    for coordinator in used.values():
+        coordinator.note_write()
+        await coordinator.async_request_refresh()
+    return {room["ther_id"]: result for room, result in zip(rooms, results)}
+
+
+@callback
+def async_setup_services(hass):
+    """Register the integration-wide services."""
+
+    async def apply_profile(call: ServiceCall):
+        return {"rooms": await async_apply_profile(hass, call.data["rooms"])}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_PROFILE,
+        apply_profile,
+        schema=APPLY_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
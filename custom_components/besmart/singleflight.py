@@ -0,0 +1,74 @@
+import asyncio
+import time
+from functools import partial
+
+
+class SingleFlight:
+    """Merges concurrent identical reads into one request.
+
+    Callers asking for a key that is already being fetched await the same
+    task instead of sending their own request. With ``ttl`` > 0 successful
+    answers are also served from memory for ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl=0.0, clock=time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._inflight = {}
+        self._cache = {}
+        self.requests = 0
+        self.merged = 0
+        self.hits = 0
+
+    async def do(self, key, fetch):
+        """Return the answer of ``fetch()`` for ``key``, shared with concurrent callers."""
+        self.requests += 1
+        if self._ttl:
+            cached = self._cache.get(key)
+            if cached is not None and self._clock() - cached[0] < self._ttl:
+                self.hits += 1
+                return cached[1]
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._done, key))
+        else:
+            self.merged += 1
+        # a cancelled caller must not cancel the fetch the others wait for
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is not task:
+            # detached by invalidate(): the answer may predate a write
+            return
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self._ttl and task.result() is not None:
+            self._cache[key] = (self._clock(), task.result())
+
+    def invalidate(self, *keys):
+        """Drop cached answers for ``keys``, or all of them.
+
+        Reads in flight are detached rather than cancelled: their callers
+        still get the answer, but later callers start a new request and the
+        answer is not cached.
+        """
+        if not keys:
+            self._cache.clear()
+            self._inflight.clear()
+        for key in keys:
+            self._cache.pop(key, None)
+            self._inflight.pop(key, None)
+
+    @property
+    def stats(self):
+        saved = self.merged + self.hits
+        return {
+            "ttl": self._ttl,
+            "requests": self.requests,
+            "merged": self.merged,
+            "cache_hits": self.hits,
+            "saved_ratio": saved / self.requests if self.requests else None,
+        }
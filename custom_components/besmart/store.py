@@ -0,0 +1,48 @@
+import logging
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_VERSION, STORE_SAVE_DELAY, STORE_TTL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BesmartStore:
+    """Last-known state of one config entry, kept in HA's storage.
+
+    Holds the room names, the latest room payloads (weekly program
+    included) and the cached roomMark/tempUnit/settings of every room,
+    so a restart can show real states and write without refetching.
+    """
+
+    def __init__(self, hass, entry_id, ttl=STORE_TTL):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._ttl = ttl
+
+    async def async_load(self):
+        """Return the saved snapshot and its age in seconds, or None if missing or stale."""
+        saved = await self._store.async_load()
+        if not saved:
+            return None
+        saved_at = dt_util.parse_datetime(saved.get("saved_at") or "")
+        if saved_at is None:
+            return None
+        age = (dt_util.utcnow() - saved_at).total_seconds()
+        if age > self._ttl.total_seconds():
+            _LOGGER.debug("Ignoring BeSmart state saved %.0f seconds ago", age)
+            return None
+        return saved, max(age, 0.0)
+
+    def _data(self, coordinator):
+        return dict(coordinator.snapshot(), saved_at=dt_util.utcnow().isoformat())
+
+    def async_delay_save(self, coordinator):
+        """Save the coordinator state soon, batching consecutive refreshes."""
+        self._store.async_delay_save(lambda: self._data(coordinator), STORE_SAVE_DELAY)
+
+    async def async_save(self, coordinator):
+        await self._store.async_save(self._data(coordinator))
+
+    async def async_remove(self):
+        await self._store.async_remove()
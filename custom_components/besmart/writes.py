@@ -0,0 +1,105 @@
+import asyncio
+import logging
+
+from .const import DEFAULT_WRITE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """Per-room write queue that coalesces bursts of writes.
+
+    A write waits ``delay`` seconds before it is sent. Writes of the same
+    kind (setpoint, mode, season) to the same room queued in the meantime
+    supersede it, so only the last value is sent and every caller gets the
+    result of that write. Each room has its own worker, so writes to
+    different rooms go out concurrently while writes to one room stay in
+    order.
+
+    The counters in ``stats`` do not overlap: ``writes_sent`` counts writes
+    that reached the cloud, ``writes_coalesced`` values superseded before
+    they were sent, ``writes_failed`` sent writes that raised or were
+    rejected, and ``writes_dropped`` writes still queued when the queue was
+    cancelled.
+    """
+
+    def __init__(self, delay=DEFAULT_WRITE_DELAY, sleep=asyncio.sleep):
+        self._delay = delay
+        self._sleep = sleep
+        self._pending = {}
+        self._workers = {}
+        self.writes_sent = 0
+        self.writes_coalesced = 0
+        self.writes_failed = 0
+        self.writes_dropped = 0
+
+    @property
+    def stats(self):
+        return {
+            "delay": self._delay,
+            "pending": sum(len(room) for room in self._pending.values()),
+            "writes_sent": self.writes_sent,
+            "writes_coalesced": self.writes_coalesced,
+            "writes_failed": self.writes_failed,
+            "writes_dropped": self.writes_dropped,
+        }
+
+    async def submit(self, ther_id, kind, value, write):
+        """Queue ``write(value)`` and return the result of the write that went out."""
+        future = asyncio.get_running_loop().create_future()
+        room = self._pending.setdefault(ther_id, {})
+        futures = [future]
+        if kind in room:
+            _LOGGER.debug("Coalescing %s write for room %s: %s", kind, ther_id, value)
+            self.writes_coalesced += 1
+            futures = room.pop(kind)[2] + futures
+        room[kind] = (value, write, futures)
+        if ther_id not in self._workers:
+            self._workers[ther_id] = asyncio.create_task(self._run(ther_id))
+        return await future
+
+    async def _run(self, ther_id):
+        batch = {}
+        try:
+            while self._pending.get(ther_id):
+                await self._sleep(self._delay)
+                batch = self._pending.pop(ther_id, {})
+                for kind, (value, write, futures) in batch.items():
+                    try:
+                        result = await write(value)
+                    except Exception as ex:
+                        _LOGGER.warning("%s write for room %s failed: %s", kind, ther_id, ex)
+                        self.writes_failed += 1
+                        self._resolve(futures, exception=ex)
+                        continue
+                    self.writes_sent += 1
+                    if not result:
+                        self.writes_failed += 1
+                    self._resolve(futures, result=result)
+        except asyncio.CancelledError:
+            for _, _, futures in batch.values():
+                self._resolve(futures, result=None)
+            raise
+        finally:
+            self._workers.pop(ther_id, None)
+
+    @staticmethod
+    def _resolve(futures, result=None, exception=None):
+        for future in futures:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def cancel(self):
+        """Drop everything still queued, e.g. when the config entry unloads."""
+        for worker in self._workers.values():
+            worker.cancel()
+        for room in self._pending.values():
+            for _, _, futures in room.values():
+                self.writes_dropped += 1
+                self._resolve(futures, result=None)
+        self._pending.clear()
+        self._workers.clear()
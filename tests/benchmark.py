@@ -0,0 +1,124 @@
+"""Load benchmark of the BeSmart polling and write paths against the fake cloud.
+
+Run from the repository root:
+
+    PYTHONPATH=. python tests/benchmark.py --rooms 1 10 50 200 --latency 0.02
+
+For every fleet size it reports requests per poll cycle, p50/p99 latency
+of a poll cycle (or of a single write) and CPU time spent on the event
+loop thread, which runs all client code; the fake server runs in other
+threads and is not counted.
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from custom_components.besmart.poller import RoomPoller
+from fake_besmart import FakeBesmart, make_client, make_room, open_session
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def bench_poll(server, ther_ids, cycles, bulk):
+    session = open_session()
+    besmart = make_client(server, session, "bench", "bench")
+    try:
+        poller = RoomPoller(besmart, ther_ids, bulk=bulk)
+        # the first cycle logs in and loads every full payload
+        await poller.async_poll()
+        requests = server.total_requests
+        latencies = []
+        cpu = time.thread_time()
+        for _ in range(cycles):
+            start = time.perf_counter()
+            data = await poller.async_poll()
+            latencies.append(time.perf_counter() - start)
+            assert len(data) == len(ther_ids), "rooms missing from poll"
+        cpu = time.thread_time() - cpu
+        return (server.total_requests - requests) / cycles, latencies, cpu / cycles
+    finally:
+        await session.close()
+
+
+async def bench_write(server, ther_ids, cycles):
+    session = open_session()
+    besmart = make_client(server, session, "bench", "bench")
+    try:
+        await besmart.rooms()
+        requests = server.total_requests
+        latencies = []
+
+        async def write(ther_id, value):
+            start = time.perf_counter()
+            await besmart.setRoomConfortTemp(ther_id, value)
+            latencies.append(time.perf_counter() - start)
+
+        cpu = time.thread_time()
+        for cycle in range(cycles):
+            value = 20.0 + cycle % 5 / 2
+            await asyncio.gather(*(write(ther_id, value) for ther_id in ther_ids))
+        cpu = time.thread_time() - cpu
+        return (server.total_requests - requests) / cycles, latencies, cpu / cycles
+    finally:
+        await session.close()
+
+
+async def run(args):
+    results = []
+    for count in args.rooms:
+        ther_ids = [str(i) for i in range(1, count + 1)]
+        scenarios = {
+            "poll-bulk": lambda server: bench_poll(server, ther_ids, args.cycles, True),
+            "poll-per-room": lambda server: bench_poll(server, ther_ids, args.cycles, False),
+            "write": lambda server: bench_write(server, ther_ids, args.cycles),
+        }
+        for name, scenario in scenarios.items():
+            server = FakeBesmart(
+                rooms=[make_room(ther_id) for ther_id in ther_ids],
+                latency=args.latency,
+                error_rate=args.error_rate,
+                session_ttl=args.session_ttl,
+            ).start()
+            try:
+                requests, latencies, cpu = await scenario(server)
+            finally:
+                server.stop()
+            results.append({
+                "scenario": name,
+                "rooms": count,
+                "requests_per_cycle": round(requests, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "cpu_ms_per_cycle": round(cpu * 1000, 2),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=None, help="server-side session lifetime")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per result")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{c:>18}" for c in columns))
+    for result in results:
+        print("  ".join(f"{result[c]:>18}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""A small stand-in for the BeSmart cloud, served from a local thread."""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+
+from custom_components.besmart.api import Besmart
+
+
+class _QuietServer(ThreadingHTTPServer):
+    # benchmarks open hundreds of connections at once
+    request_queue_size = 512
+
+    def handle_error(self, request, client_address):
+        # clients hanging up on slow answers is expected in timeout tests
+        pass
+
+
+def make_settings(**fields):
+    settings = {
+        "error": 0,
+        "minTempSetPoint": "30.0",
+        "maxTempSetPoint": "80.0",
+        "tempCurver": "1.5",
+        "sensorInfluence": "0",
+        "unit": "0",
+        "season": "1",
+        "boilerIsOnline": "1",
+    }
+    settings.update(fields)
+    return settings
+
+
+def make_room(ther_id, name=None, **fields):
+    room = {
+        "error": 0,
+        "therId": str(ther_id),
+        "name": name or f"room {ther_id}",
+        "roomMark": str(ther_id),
+        "mode": "2",
+        "heating": "0",
+        "tempUnit": "0",
+        "season": "1",
+        "tempNow": "20.0",
+        "comfT": "21.0",
+        "saveT": "18.0",
+        "frostT": "5.0",
+        "tempOut": "10.0",
+        "bat": "0",
+        "programWeek": ["2" * 48 for _ in range(7)],
+    }
+    room.update(fields)
+    return room
+
+
+def open_session():
+    # the fake server lives on an IP address, which the default cookie jar ignores
+    return aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+
+def make_client(server, session, username="user", password="pwd", **kwargs):
+    """Return a Besmart client talking to ``server``; ``kwargs`` go to Besmart."""
+    return Besmart(username, password, session, base_url=server.url, **kwargs)
+
+
+def start_fake(test, rooms, **kwargs):
+    """Start a FakeBesmart and a session for ``test``, closed again by its cleanups."""
+    server = FakeBesmart(rooms=rooms, **kwargs).start()
+    test.addCleanup(server.stop)
+    session = open_session()
+    test.addAsyncCleanup(session.close)
+    return server, session
+
+
+class FakeBesmart:
+    """Fake cloud keeping per-endpoint request counts and valid session ids."""
+
+    SETPOINTS = {
+        "setComfTemp.php": "comfT",
+        "setEconTemp.php": "saveT",
+        "setFrostTemp.php": "frostT",
+        "setRoomTemp.php": "comfT",
+    }
+
+    def __init__(
+        self, rooms=None, device_id="D1", latency=0.0, error_rate=0.0, session_ttl=None, seed=0
+    ):
+        self.device_id = device_id
+        # seconds after which the server forgets a session, None to keep them
+        self.session_ttl = session_ttl
+        # seconds added to every answer, and share of requests failing with HTTP 500
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_next = 0
+        # answer this many requests with an HTML page instead of JSON, like maintenance
+        self.html_next = 0
+        self._random = random.Random(seed)
+        self.rooms = {r["therId"]: r for r in (rooms or [make_room(1)])}
+        self.settings = {ther_id: make_settings() for ther_id in self.rooms}
+        # answer every write with this error code instead of applying it
+        self.reject_writes = None
+        self.unlisted = set()
+        self.sessions = {}
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive, like the real cloud
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                fake._handle(self, {})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode()
+                fake._handle(self, {k: v[0] for k, v in parse_qs(body).items()})
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _QuietServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def expire_sessions(self):
+        with self._lock:
+            self.sessions.clear()
+
+    def count(self, endpoint):
+        return self.requests.get(endpoint, 0)
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    def _session_alive(self, session):
+        issued = self.sessions.get(session)
+        if issued is None:
+            return False
+        return self.session_ttl is None or time.monotonic() - issued < self.session_ttl
+
+    def _room_by_mark(self, mark):
+        return next((r for r in self.rooms.values() if r["roomMark"] == mark), None)
+
+    def _write(self, endpoint, form):
+        room = self._room_by_mark(form.get("therId"))
+        if room is None or self.reject_writes is not None:
+            return {"error": self.reject_writes if room else 0}
+        if endpoint == "setRoomMode.php":
+            room["mode"] = form["mode"]
+        else:
+            room[self.SETPOINTS[endpoint]] = f"{form['tempSet']}.{form['tempSetFloat']}"
+        # setters answer 1 on success
+        return {"error": 1}
+
+    def _set_settings(self, form):
+        room = self._room_by_mark(form.get("therId"))
+        if room is None or self.reject_writes is not None:
+            return {"error": self.reject_writes if room else 1}
+        self.settings[room["therId"]].update(season=form["season"], unit=form["unit"])
+        room["season"] = form["season"]
+        return {"error": 0}
+
+    def _handle(self, request, form):
+        url = urlparse(request.path)
+        endpoint = url.path.rsplit("/", 1)[-1]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            failing = self.fail_next > 0 or self._random.random() < self.error_rate
+            if self.fail_next > 0:
+                self.fail_next -= 1
+            html = not failing and self.html_next > 0
+            if html:
+                self.html_next -= 1
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            request.send_response(500)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        if html:
+            page = b"<html><body>Maintenance</body></html>"
+            request.send_response(200)
+            request.send_header("Content-Type", "text/html")
+            request.send_header("Content-Length", str(len(page)))
+            request.end_headers()
+            request.wfile.write(page)
+            return
+        cookie = request.headers.get("Cookie", "")
+        session = dict(
+            c.strip().split("=", 1) for c in cookie.split(";") if "=" in c
+        ).get("PHPSESSID")
+        headers = {}
+
+        if endpoint == "login.php":
+            session = uuid.uuid4().hex
+            with self._lock:
+                self.sessions[session] = time.monotonic()
+            headers["Set-Cookie"] = f"PHPSESSID={session}; Path=/"
+            body = {"error": 0, "deviceId": self.device_id}
+        elif not self._session_alive(session):
+            body = {"error": 2, "msg": "session expired"}
+        elif endpoint == "getRoomList.php":
+            body = [
+                {k: v for k, v in r.items() if k not in ("error", "programWeek")}
+                | {"id": r["therId"]}
+                for r in self.rooms.values()
+                if r["therId"] not in self.unlisted
+            ]
+        elif endpoint == "getRoomData196.php":
+            room = self.rooms.get(query.get("therId"))
+            body = room if room else {"error": 1}
+        elif endpoint in self.SETPOINTS or endpoint == "setRoomMode.php":
+            body = self._write(endpoint, form)
+        elif endpoint == "getSetting.php":
+            settings = self.settings.get(form.get("therId"))
+            body = dict(settings) if settings else {"error": 1}
+        elif endpoint == "setSetting.php":
+            body = self._set_settings(form)
+        else:
+            request.send_response(404)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        payload = json.dumps(body).encode()
+        request.send_response(200)
+        request.send_header("Content-Type", "text/html")
+        request.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(payload)
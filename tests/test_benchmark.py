@@ -0,0 +1,27 @@
+import argparse
+import unittest
+
+from benchmark import percentile, run
+
+
+class TestBenchmark(unittest.IsolatedAsyncioTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+
+    async def test_small_run(self):
+        args = argparse.Namespace(
+            rooms=[3], cycles=2, latency=0.0, error_rate=0.0, session_ttl=None
+        )
+
+        results = {r["scenario"]: r for r in await run(args)}
+
+        self.assertEqual(results["poll-bulk"]["requests_per_cycle"], 1)
+        self.assertEqual(results["poll-per-room"]["requests_per_cycle"], 3)
+        self.assertEqual(results["write"]["requests_per_cycle"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import asyncio
+import unittest
+
+from custom_components.besmart.api import Besmart
+from custom_components.besmart.ratelimit import TokenBucket
+from custom_components.besmart.resilience import InvalidSetpointError
+from fake_besmart import make_client, make_room, start_fake
+
+
+class TestBesmartSession(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server, self.session = start_fake(self, [make_room(1), make_room(2)])
+        self.besmart = make_client(self.server, self.session)
+
+    async def test_session_is_reused(self):
+        for _ in range(3):
+            self.assertEqual((await self.besmart.roomByTherId("1"))["therId"], "1")
+        await self.besmart.roomByTherId("2")
+
+        self.assertEqual(self.server.count("login.php"), 1)
+        self.assertEqual(self.server.count("getRoomData196.php"), 4)
+        self.assertEqual(self.besmart.login_stats, {"logins": 1, "logins_avoided": 3, "writes_skipped": 0})
+
+    async def test_login_again_when_session_expires(self):
+        await self.besmart.roomByTherId("1")
+        self.server.expire_sessions()
+
+        data = await self.besmart.roomByTherId("1")
+
+        self.assertEqual(data["error"], 0)
+        self.assertEqual(self.server.count("login.php"), 2)
+        self.assertEqual(self.server.count("getRoomData196.php"), 3)
+
+    async def test_login_again_when_ttl_runs_out(self):
+        besmart = make_client(self.server, self.session, session_ttl=60)
+        await besmart.roomByTherId("1")
+        await besmart.roomByTherId("1")
+        besmart._login_time -= 61
+        await besmart.roomByTherId("1")
+
+        self.assertEqual(self.server.count("login.php"), 2)
+        self.assertEqual(besmart.logins_avoided, 1)
+
+    async def test_unknown_room_does_not_loop(self):
+        await self.besmart.roomByTherId("1")
+
+        data = await self.besmart.roomByTherId("99")
+
+        self.assertEqual(data["error"], 1)
+        self.assertEqual(self.server.count("login.php"), 1)
+
+    async def test_unknown_rooms_keep_the_session(self):
+        for _ in range(5):
+            for ther_id in ("1", "2", "99"):
+                await self.besmart.roomByTherId(ther_id)
+
+        self.assertEqual(self.server.count("login.php"), 1)
+
+    async def test_room_refused_after_login_does_not_log_in_again(self):
+        self.server.rooms["3"] = make_room(3, error=Besmart.SESSION_EXPIRED)
+        await self.besmart.roomByTherId("1")
+
+        for _ in range(3):
+            self.assertEqual((await self.besmart.roomByTherId("3"))["error"], 2)
+
+        self.assertEqual(self.server.count("login.php"), 2)
+        self.assertEqual(self.server.count("getRoomData196.php"), 5)
+
+    async def test_requests_are_measured(self):
+        self.server.fail_next = 1
+        await self.besmart.rooms()
+
+        stats = self.besmart.metrics.stats
+        self.assertEqual(stats["endpoints"]["login.php"]["errors"], 1)
+        self.assertEqual(stats["endpoints"]["login.php"]["count"], 2)
+        self.assertEqual(stats["endpoints"]["getRoomList.php"]["count"], 1)
+        self.assertGreater(stats["totals"]["bytes_received"], 0)
+        self.assertGreater(stats["totals"]["bytes_sent"], 0)
+        self.assertEqual(stats["totals"]["logins_last_hour"], 1)
+
+    async def test_concurrent_reads_share_one_request(self):
+        results = await asyncio.gather(
+            *(self.besmart.roomByTherId("1") for _ in range(4)), self.besmart.roomByTherId("2")
+        )
+
+        self.assertEqual([r["therId"] for r in results], ["1"] * 4 + ["2"])
+        self.assertEqual(self.server.count("getRoomData196.php"), 2)
+        self.assertEqual(self.server.count("login.php"), 1)
+        self.assertEqual(self.besmart.reads.merged, 3)
+
+    async def test_requests_pass_both_rate_limiters(self):
+        account, host = TokenBucket(10, 2), TokenBucket(100, 2)
+        besmart = make_client(
+            self.server, self.session, limiter=account, host_limiter=host
+        )
+
+        await asyncio.gather(*(besmart.roomByTherId(t) for t in ("1", "2")))
+
+        self.assertEqual(account.acquired, 3)
+        self.assertEqual(host.acquired, 3)
+        self.assertEqual(account.waited, 1)
+
+    async def test_rooms_reuses_session(self):
+        await self.besmart.roomByTherId("1")
+
+        rooms = await self.besmart.rooms()
+
+        self.assertEqual(set(rooms), {"room 1", "room 2"})
+        self.assertEqual(self.server.count("login.php"), 1)
+
+
+class TestBesmartWrites(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server, self.session = start_fake(self, [make_room(1), make_room(2)])
+        self.besmart = make_client(self.server, self.session)
+        await self.besmart.rooms()
+
+    async def test_setpoint_is_a_single_post(self):
+        self.assertTrue(await self.besmart.setRoomConfortTemp("1", 22.5))
+        self.assertTrue(await self.besmart.setRoomECOTemp("1", 17.0))
+
+        self.assertEqual(self.server.rooms["1"]["comfT"], "22.5")
+        self.assertEqual(self.server.rooms["1"]["saveT"], "17.0")
+        self.assertEqual(self.server.count("getRoomData196.php"), 0)
+        self.assertEqual(self.server.count("login.php"), 1)
+
+    async def test_unchanged_setpoint_is_not_sent(self):
+        self.assertTrue(await self.besmart.setRoomConfortTemp("1", 21.0))
+        self.assertTrue(await self.besmart.setRoomFrostTemp("1", 6.0))
+        self.assertTrue(await self.besmart.setRoomFrostTemp("1", 6.0))
+
+        self.assertEqual(self.server.count("setComfTemp.php"), 0)
+        self.assertEqual(self.server.count("setFrostTemp.php"), 1)
+        self.assertEqual(self.besmart.writes_skipped, 2)
+        self.assertNotIn("frostT", self.besmart.meta_snapshot(["1"])["1"])
+
+    async def test_out_of_range_setpoint_is_refused_locally(self):
+        requests = self.server.total_requests
+
+        with self.assertRaises(InvalidSetpointError):
+            await self.besmart.setRoomECOTemp("1", 40.0)
+
+        self.assertEqual(self.server.total_requests, requests)
+
+    async def test_unknown_room_is_fetched_once(self):
+        self.besmart.forget("2")
+
+        await self.besmart.setRoomMode("2", "3")
+        await self.besmart.setRoomMode("2", "2")
+
+        self.assertEqual(self.server.count("getRoomData196.php"), 1)
+        self.assertEqual(self.server.rooms["2"]["mode"], "2")
+
+    async def test_set_settings_reads_settings_once(self):
+        self.assertIsNotNone(await self.besmart.setSettings("1", "0"))
+        self.assertIsNotNone(await self.besmart.setSettings("1", "1"))
+
+        self.assertEqual(self.server.count("getSetting.php"), 1)
+        self.assertEqual(self.server.count("setSetting.php"), 2)
+        self.assertEqual(self.server.count("getRoomData196.php"), 0)
+
+    async def test_stale_settings_are_read_again(self):
+        await self.besmart.setSettings("1", "0")
+        self.besmart._meta["1"]["settings_at"] -= Besmart.SETTINGS_TTL + 1
+
+        await self.besmart.setSettings("1", "1")
+
+        self.assertEqual(self.server.count("getSetting.php"), 2)
+        self.assertEqual(self.besmart.cached_settings("1").season, "1")
+
+    async def test_season_change_survives_refetched_metadata(self):
+        besmart = make_client(self.server, self.session, read_cache_ttl=60)
+        await besmart.getSettings("1")
+        # forgotten and fetched again: the cached answer is not in the new meta
+        besmart.forget("1")
+
+        self.assertIsNotNone(await besmart.setSettings("1", "0"))
+
+        self.assertEqual(besmart.cached_settings("1").season, "0")
+        self.assertEqual(self.server.settings["1"]["season"], "0")
+
+    async def test_rejected_settings_write_is_retried_once(self):
+        await self.besmart.getSettings("1")
+        self.server.reject_writes = 3
+
+        self.assertIsNone(await self.besmart.setSettings("1", "0"))
+
+        self.assertEqual(self.server.count("setSetting.php"), 2)
+        self.assertEqual(self.server.count("getSetting.php"), 2)
+
+    async def test_write_drops_cached_room_data(self):
+        besmart = make_client(self.server, self.session, read_cache_ttl=60)
+        await besmart.roomByTherId("1")
+        await besmart.roomByTherId("1")
+
+        await besmart.setRoomConfortTemp("1", 23.0)
+        data = await besmart.roomByTherId("1")
+
+        self.assertEqual(data["comfT"], "23.0")
+        self.assertEqual(self.server.count("getRoomData196.php"), 2)
+
+    async def test_rejected_write_invalidates_metadata(self):
+        self.server.reject_writes = 3
+
+        self.assertIsNone(await self.besmart.setRoomMode("1", "3"))
+        self.server.reject_writes = None
+        self.assertTrue(await self.besmart.setRoomMode("1", "3"))
+
+        self.assertEqual(self.server.count("getRoomData196.php"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from custom_components.besmart import cli
+from fake_besmart import FakeBesmart, make_room
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBesmart(rooms=[make_room(1), make_room(2, comfT="22.5")]).start()
+        self.addCleanup(self.server.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def run_cli(self, *args, fmt="jsonl", name="out"):
+        path = os.path.join(self.dir, name)
+        argv = ["--username", "u", "--password", "p", "--base-url", self.server.url]
+        code = cli.main(argv + ["--format", fmt, "--output", path, *args])
+        with open(path) as output:
+            return code, output.read()
+
+    def test_poll_streams_one_record_per_request(self):
+        code, output = self.run_cli("poll", "--cycles", "2")
+
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(code, 0)
+        self.assertEqual(len(records), 4)
+        self.assertTrue(all(r["ok"] and r["elapsed_ms"] >= 0 for r in records))
+        self.assertEqual(self.server.count("login.php"), 1)
+        self.assertEqual(self.server.count("getRoomData196.php"), 4)
+
+    def test_rooms_as_csv(self):
+        code, output = self.run_cli("rooms", fmt="csv")
+
+        rows = list(csv.DictReader(output.splitlines()))
+        self.assertEqual(code, 0)
+        self.assertEqual({row["ther_id"] for row in rows}, {"1", "2"})
+        self.assertEqual({row["comfT"] for row in rows}, {"21.0", "22.5"})
+
+    def test_replay_parses_recorded_polls(self):
+        self.run_cli("poll", "--ther-id", "2", name="poll.jsonl")
+        recorded = os.path.join(self.dir, "poll.jsonl")
+        with open(recorded, "a") as file:
+            file.write("not json\n")
+        path = os.path.join(self.dir, "replay.jsonl")
+
+        code = cli.main(["--output", path, "replay", recorded])
+
+        with open(path) as output:
+            results = [json.loads(line) for line in output]
+        self.assertEqual(code, 1)
+        self.assertEqual(results[0]["state"]["comfort"], 22.5)
+        self.assertEqual(results[0]["preset_mark"], "2")
+        self.assertFalse(results[1]["ok"])
+
+    def test_credentials_are_required(self):
+        self.assertEqual(cli.main(["--username", "", "login"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from custom_components.besmart.clients import async_get_client, async_release_client
+from custom_components.besmart.const import DATA_CLIENTS, DOMAIN
+
+
+class TestClientRegistry(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.hass = MagicMock()
+        self.hass.data = {}
+        patcher = patch("custom_components.besmart.clients.async_create_clientsession")
+        self.create_session = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_client_per_account(self):
+        first = async_get_client(self.hass, "Alice", "pwd")
+        second = async_get_client(self.hass, "alice", "pwd")
+        other = async_get_client(self.hass, "bob", "pwd")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(self.create_session.call_count, 2)
+
+    def test_new_password_replaces_the_client(self):
+        first = async_get_client(self.hass, "alice", "old")
+        second = async_get_client(self.hass, "alice", "new")
+
+        self.assertIsNot(first, second)
+        self.assertIs(async_get_client(self.hass, "alice", "new"), second)
+
+    async def test_released_only_when_no_entry_uses_it(self):
+        client = async_get_client(self.hass, "alice", "pwd")
+        self.hass.data[DOMAIN]["entry"] = MagicMock(besmart=client)
+
+        await async_release_client(self.hass, "Alice")
+        self.assertIn("alice", self.hass.data[DOMAIN][DATA_CLIENTS])
+
+        del self.hass.data[DOMAIN]["entry"]
+        await async_release_client(self.hass, "Alice")
+        self.assertEqual(self.hass.data[DOMAIN][DATA_CLIENTS], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
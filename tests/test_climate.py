@@ -1,7 +1,11 @@
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock, AsyncMock
 from custom_components.besmart.climate import Thermostat, Besmart
+from custom_components.besmart.models import RoomState
 from homeassistant.components.climate.const import HVACMode, HVACAction
+from homeassistant.exceptions import ServiceValidationError
 
 class MockResponse:
     def __init__(self, json_data, status_code=200):
@@ -14,14 +18,18 @@ class MockResponse:
 
 class TestBesmartThermostat(unittest.TestCase):
     def setUp(self):
+        # Mock the coordinator feeding the entity
+        self.coordinator = MagicMock()
+        self.coordinator.data = {}
+        self.coordinator.room_state.side_effect = (
+            lambda ther_id: RoomState.from_payload(self.coordinator.data[ther_id])
+        )
         self.thermostat = Thermostat(
+            self.coordinator,
+            room_name="test_room",
             name="Test Thermostat",
-            username="test",
-            password="test",
-            room_name="test_room"
         )
-        # Mock the Besmart class
-        self.thermostat._besmart = MagicMock()
+        self.thermostat.async_write_ha_state = MagicMock()
 
     def test_mode_5_should_be_off(self):
         # Simulate response with mode=5
@@ -39,10 +47,10 @@ class TestBesmartThermostat(unittest.TestCase):
             "bat": "1"
         }
         
-        self.thermostat._besmart.roomByTherId.return_value = mock_data
+        self.coordinator.data = {"test_room": mock_data}
         
         # Update the thermostat
-        self.thermostat.update()
+        self.thermostat._handle_coordinator_update()
         
         # Check that HVAC mode is OFF
         self.assertEqual(self.thermostat.hvac_mode, HVACMode.OFF)
@@ -64,10 +72,10 @@ class TestBesmartThermostat(unittest.TestCase):
             "bat": "1"
         }
         
-        self.thermostat._besmart.roomByTherId.return_value = mock_data
+        self.coordinator.data = {"test_room": mock_data}
         
         # Update the thermostat
-        self.thermostat.update()
+        self.thermostat._handle_coordinator_update()
         
         # Check that HVAC mode is HEAT and action is HEATING
         self.assertEqual(self.thermostat.hvac_mode, HVACMode.HEAT)
@@ -89,13 +97,141 @@ class TestBesmartThermostat(unittest.TestCase):
             "bat": "1"
         }
         
-        self.thermostat._besmart.roomByTherId.return_value = mock_data
+        self.coordinator.data = {"test_room": mock_data}
         
         # Update the thermostat
-        self.thermostat.update()
+        self.thermostat._handle_coordinator_update()
         
         # Check that HVAC mode is OFF based on season
         self.assertEqual(self.thermostat.hvac_mode, HVACMode.OFF)
+    def test_program_sets_preset_and_next_change(self):
+        mock_data = {
+            "error": 0,
+            "mode": "2",
+            "heating": "0",
+            "tempUnit": "0",
+            "season": "1",
+            "tempNow": "20.0",
+            "comfT": "21.0",
+            "saveT": "19.0",
+            "frostT": "5.0",
+            "tempOut": "18.0",
+            "bat": "1",
+            # eco until 06:00, comfort for the rest of the day
+            "programWeek": ["1" * 12 + "2" * 36] * 7,
+        }
+        self.coordinator.data = {"test_room": mock_data}
+
+        now = datetime(2024, 1, 8, 5, 15, tzinfo=timezone.utc)
+        with patch("custom_components.besmart.climate.dt_util.now", return_value=now):
+            self.thermostat._handle_coordinator_update()
+
+        attributes = self.thermostat.extra_state_attributes
+        self.assertEqual(attributes["preset_mark"], "1")
+        self.assertEqual(attributes["next_preset_change"], "2024-01-08T06:00:00+00:00")
+
+
+class TestOptimisticWrites(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.room = {
+            "error": 0,
+            "mode": "2",
+            "heating": "0",
+            "tempUnit": "0",
+            "season": "1",
+            "tempNow": "20.0",
+            "comfT": "21.0",
+            "saveT": "19.0",
+            "frostT": "5.0",
+            "tempOut": "18.0",
+            "bat": "1"
+        }
+        self.coordinator = MagicMock()
+        self.coordinator.data = {"test_room": dict(self.room)}
+        self.coordinator.room_state.side_effect = (
+            lambda ther_id: RoomState.from_payload(self.coordinator.data[ther_id])
+        )
+        self.coordinator.writes.submit = AsyncMock(return_value=True)
+        self.coordinator.async_request_refresh = AsyncMock()
+        self.thermostat = Thermostat(self.coordinator, "test_room", "Test Thermostat")
+        self.thermostat.hass = MagicMock()
+        self.tasks = []
+        self.thermostat.hass.async_create_task.side_effect = (
+            lambda coro: self.tasks.append(asyncio.ensure_future(coro))
+        )
+        self.thermostat.async_write_ha_state = MagicMock()
+
+    def refresh(self, **fields):
+        self.coordinator.data = {"test_room": dict(self.room, **fields)}
+        self.thermostat._handle_coordinator_update()
+
+    async def test_hvac_mode_is_applied_before_the_write(self):
+        await self.thermostat.async_set_hvac_mode(HVACMode.OFF)
+
+        self.assertEqual(self.thermostat.hvac_mode, HVACMode.OFF)
+        self.thermostat.async_write_ha_state.assert_called()
+        self.coordinator.writes.submit.assert_not_awaited()
+
+        # a poll landing while the write is in flight does not flicker
+        self.refresh()
+        self.assertEqual(self.thermostat.hvac_mode, HVACMode.OFF)
+
+        await asyncio.gather(*self.tasks)
+        self.coordinator.expire_room.assert_called_with("test_room")
+        self.coordinator.async_request_refresh.assert_awaited()
+
+        self.refresh(season="0")
+        self.assertEqual(self.thermostat.hvac_mode, HVACMode.OFF)
+        self.assertEqual(self.thermostat._optimistic, {})
+
+    async def test_failed_write_rolls_back(self):
+        self.coordinator.writes.submit.return_value = None
+
+        await self.thermostat.async_set_temperature(temperature=23.0)
+        self.assertEqual(self.thermostat.target_temperature, 23.0)
+        await asyncio.gather(*self.tasks)
+
+        self.assertEqual(self.thermostat.target_temperature, 21.0)
+        self.coordinator.async_request_refresh.assert_not_awaited()
+
+    async def test_device_disagreeing_rolls_back(self):
+        await self.thermostat.async_set_preset_mode("eco")
+        self.assertEqual(self.thermostat.preset_mode, "eco")
+        await asyncio.gather(*self.tasks)
+
+        self.refresh(mode="2")
+
+        self.assertEqual(self.thermostat.preset_mode, "comfort")
+        self.assertEqual(self.thermostat._optimistic, {})
+
+    async def test_setpoint_already_set_is_not_written(self):
+        await self.thermostat.async_set_temperature(temperature=21.0)
+        await self.thermostat.async_set_preset_mode("comfort")
+
+        self.assertEqual(self.tasks, [])
+        self.assertEqual(self.thermostat._optimistic, {})
+
+    async def test_out_of_range_setpoint_is_refused(self):
+        with self.assertRaises(ServiceValidationError):
+            await self.thermostat.async_set_temperature(temperature=21.0, target_temp_low=40.0)
+
+        self.assertEqual(self.tasks, [])
+        self.assertEqual((self.thermostat.min_temp, self.thermostat.max_temp), (2.0, 35.0))
+
+    async def test_unchanged_refresh_writes_no_state(self):
+        self.refresh()
+        self.thermostat.async_write_ha_state.reset_mock()
+
+        with patch.object(self.thermostat, "_update_from_data") as parse:
+            self.refresh()
+            self.refresh()
+            self.assertEqual(parse.call_count, 0)
+            self.thermostat.async_write_ha_state.assert_not_called()
+
+            self.refresh(tempNow="20.5")
+            self.assertEqual(parse.call_count, 1)
+            self.thermostat.async_write_ha_state.assert_called_once()
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
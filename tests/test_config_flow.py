@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.exceptions import ConfigEntryAuthFailed
+
+from custom_components.besmart import async_setup_entry, async_unload_entry
+from custom_components.besmart.api import Besmart
+from custom_components.besmart.config_flow import BeSmartConfigFlow
+from custom_components.besmart.const import DATA_CLIENTS, DOMAIN
+
+
+class TestLegacyEntries(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # entries of the first config flow hold a therId and no login
+        self.entry = MagicMock(entry_id="legacy", data={"ther_id": "1234", "room_name": "casa"})
+        self.hass = MagicMock()
+        self.hass.data = {}
+        self.hass.config_entries.async_get_entry.return_value = self.entry
+
+    async def test_setup_asks_for_the_login(self):
+        with self.assertRaises(ConfigEntryAuthFailed):
+            await async_setup_entry(self.hass, self.entry)
+
+    async def test_reauth_keeps_the_thermostat(self):
+        flow = BeSmartConfigFlow()
+        flow.hass = self.hass
+        flow.context = {"source": "reauth", "entry_id": "legacy"}
+        client = MagicMock(ensure_login=AsyncMock(side_effect=[False, True]))
+
+        with patch("custom_components.besmart.config_flow.async_get_client", return_value=client):
+            result = await flow.async_step_reauth(self.entry.data)
+            self.assertEqual(result["step_id"], "reauth_confirm")
+            login = {"username": "alice", "password": "pwd"}
+            result = await flow.async_step_reauth_confirm(login)
+            self.assertEqual(result["errors"], {"base": "invalid_auth"})
+            result = await flow.async_step_reauth_confirm(login)
+
+        self.assertEqual(result["reason"], "reauth_successful")
+        self.hass.config_entries.async_update_entry.assert_called_once_with(
+            self.entry,
+            data={"ther_id": "1234", "room_name": "casa", "username": "alice", "password": "pwd"},
+        )
+        self.hass.config_entries.async_reload.assert_called_once_with("legacy")
+
+
+class TestUnload(unittest.IsolatedAsyncioTestCase):
+    async def test_coordinator_is_shut_down_once(self):
+        hass = MagicMock()
+        hass.config_entries.async_unload_platforms = AsyncMock(return_value=True)
+        coordinator = MagicMock(async_shutdown=AsyncMock())
+        hass.data = {DOMAIN: {"entry": coordinator}}
+
+        self.assertTrue(await async_unload_entry(hass, MagicMock(entry_id="entry")))
+
+        # DataUpdateCoordinator registered async_shutdown with the entry itself
+        coordinator.async_shutdown.assert_not_awaited()
+        self.assertEqual(hass.data[DOMAIN], {})
+
+
+class TestUserStep(unittest.IsolatedAsyncioTestCase):
+    async def test_wrong_password_leaves_no_client(self):
+        flow = BeSmartConfigFlow()
+        flow.hass = MagicMock()
+        flow.hass.data = {}
+        flow.context = {"source": "user"}
+
+        with (
+            patch("custom_components.besmart.clients.async_create_clientsession"),
+            patch.object(Besmart, "ensure_login", AsyncMock(return_value=False)),
+            patch.object(flow, "async_set_unique_id", AsyncMock()),
+            patch.object(flow, "_abort_if_unique_id_configured"),
+        ):
+            result = await flow.async_step_user({"username": "alice", "password": "wrong"})
+
+        self.assertEqual(result["errors"], {"base": "invalid_auth"})
+        self.assertEqual(flow.hass.data[DOMAIN][DATA_CLIENTS], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.besmart.climate import Thermostat
+from custom_components.besmart.const import ACCOUNT_BURST, ACCOUNT_RATE, STARTUP_TIMEOUT
+from custom_components.besmart.coordinator import BesmartCoordinator
+from custom_components.besmart.ratelimit import TokenBucket
+from custom_components.besmart.resilience import RetryPolicy
+from fake_besmart import make_client, make_room, start_fake
+
+
+class TestBesmartCoordinator(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server, self.session = start_fake(self, [make_room(1), make_room(2), make_room(3)])
+        self.besmart = make_client(
+            self.server,
+            self.session,
+            retry=RetryPolicy(base_delay=0.01),
+        )
+        self.coordinator = BesmartCoordinator(MagicMock(), self.besmart, ["1", "2", "3"])
+
+    async def test_one_fetch_per_room_and_one_login(self):
+        data = await self.coordinator._async_update_data()
+        await self.coordinator._async_update_data()
+
+        self.assertEqual(set(data), {"1", "2", "3"})
+        self.assertEqual(set(self.coordinator.runtime), {"1", "2", "3"})
+        self.assertEqual(self.server.count("login.php"), 1)
+        self.assertEqual(self.server.count("getRoomList.php"), 2)
+        self.assertEqual(self.server.count("getRoomData196.php"), 3)
+
+    async def test_first_poll_of_a_large_account_fits_the_rate_limit(self):
+        ther_ids = [str(i) for i in range(1, 101)]
+        self.server.rooms = {t: make_room(t) for t in ther_ids}
+        besmart = make_client(
+            self.server,
+            self.session,
+            limiter=TokenBucket(ACCOUNT_RATE, ACCOUNT_BURST),
+        )
+        coordinator = BesmartCoordinator(MagicMock(), besmart, ther_ids)
+        start = time.monotonic()
+
+        data = await coordinator._async_update_data()
+
+        self.assertLess(time.monotonic() - start, STARTUP_TIMEOUT / 5)
+        self.assertEqual(set(data), set(ther_ids))
+        self.assertEqual(data["100"]["tempNow"], "20.0")
+        self.assertEqual(self.server.total_requests, ACCOUNT_BURST)
+
+    async def test_entities_share_the_fetched_data(self):
+        self.coordinator.data = await self.coordinator._async_update_data()
+        entities = [Thermostat(self.coordinator, t, f"room {t}") for t in ("1", "2")]
+
+        self.assertEqual([e.current_temperature for e in entities], [20.0, 20.0])
+        self.assertEqual(self.server.count("getRoomData196.php"), 3)
+
+    async def test_failures_are_counted(self):
+        self.server.error_rate = 1.0
+
+        with self.assertRaises(UpdateFailed):
+            await self.coordinator._async_update_data()
+
+        stats = self.coordinator.stats
+        self.assertEqual(stats["failures"], 1)
+        self.assertEqual(stats["consecutive_failures"], 1)
+        self.assertIsNotNone(stats["last_update_duration"])
+
+    async def test_restored_snapshot_skips_startup_requests(self):
+        self.coordinator.data = await self.coordinator._async_update_data()
+        snapshot = self.coordinator.snapshot()
+
+        besmart = make_client(self.server, self.session)
+        coordinator = BesmartCoordinator(MagicMock(), besmart, ["1", "2", "3"])
+        coordinator.restore(snapshot, 60)
+        last_known = coordinator.poller.last_known()
+        await coordinator._async_update_data()
+        self.assertTrue(await besmart.setRoomMode("2", "3"))
+
+        self.assertEqual(last_known["1"]["programWeek"], ["2" * 48] * 7)
+        self.assertEqual(set(coordinator.runtime), {"1", "2", "3"})
+        self.assertEqual(self.server.count("getRoomData196.php"), 3)
+
+    async def test_stale_snapshot_is_revalidated(self):
+        self.coordinator.data = await self.coordinator._async_update_data()
+        snapshot = self.coordinator.snapshot()
+
+        coordinator = BesmartCoordinator(MagicMock(), self.besmart, ["1", "2", "3"])
+        coordinator.restore(snapshot, 3600)
+        await coordinator._async_update_data()
+
+        self.assertEqual(self.server.count("getRoomData196.php"), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+
+from custom_components.besmart.binary_sensor import BINARY_SENSORS, BesmartBinarySensor
+from custom_components.besmart.climate import Thermostat
+from custom_components.besmart.coordinator import BesmartCoordinator
+from custom_components.besmart.entity import room_entities
+from custom_components.besmart.number import SETPOINTS, BesmartSetpoint
+from custom_components.besmart.sensor import ROOM_SENSORS, BesmartRoomSensor
+from fake_besmart import make_client, make_room, start_fake
+
+
+class TestRoomEntities(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        rooms = [make_room(1, tempOut="7.5", bat="1", heating="1"), make_room(2)]
+        self.server, self.session = start_fake(self, rooms)
+        besmart = make_client(self.server, self.session)
+        self.coordinator = BesmartCoordinator(
+            MagicMock(), besmart, ["1", "2"], room_names={"1": "Living"}, write_delay=0
+        )
+        self.coordinator.async_request_refresh = AsyncMock()
+        self.coordinator.data = await self.coordinator._async_update_data()
+
+    def entity(self, entity_class, descriptions, key, ther_id="1"):
+        entities = room_entities(self.coordinator, entity_class, descriptions)
+        return next(
+            e for e in entities if e.entity_description.key == key and e._ther_id == ther_id
+        )
+
+    async def test_values_come_from_the_fetched_payload(self):
+        requests = self.server.total_requests
+
+        outdoor = self.entity(BesmartRoomSensor, ROOM_SENSORS, "outdoor_temperature")
+        battery = self.entity(BesmartBinarySensor, BINARY_SENSORS, "battery")
+        heating = self.entity(BesmartBinarySensor, BINARY_SENSORS, "heating", "2")
+        comfort = self.entity(BesmartSetpoint, SETPOINTS, "comfort_temperature")
+
+        self.assertEqual(outdoor.native_value, 7.5)
+        self.assertEqual(outdoor.name, "Living Outdoor temperature")
+        self.assertTrue(battery.is_on)
+        self.assertFalse(heating.is_on)
+        self.assertEqual(comfort.native_value, 21.0)
+        self.assertIs(self.coordinator.room_state("1"), self.coordinator.room_state("1"))
+        self.assertEqual(self.server.total_requests, requests)
+
+    async def test_missing_outdoor_temperature_is_unknown(self):
+        room = dict(self.coordinator.data["2"])
+        del room["tempOut"]
+        self.coordinator.data = dict(self.coordinator.data, **{"2": room})
+
+        outdoor = self.entity(BesmartRoomSensor, ROOM_SENSORS, "outdoor_temperature", "2")
+
+        self.assertIsNone(outdoor.native_value)
+
+    async def test_climate_reuses_the_decoded_state(self):
+        thermostat = Thermostat(self.coordinator, "1", "Living")
+        thermostat.async_write_ha_state = MagicMock()
+        self.assertIs(thermostat._room_state, self.coordinator.room_state("1"))
+
+        self.coordinator.data = await self.coordinator._async_update_data()
+        thermostat._handle_coordinator_update()
+        self.assertIs(thermostat._room_state, self.coordinator.room_state("1"))
+
+        # optimistic overrides are decoded on their own
+        thermostat._optimistic["comfT"] = ["23.0", True]
+        thermostat._render(force=True)
+        self.assertEqual(thermostat.target_temperature, 23.0)
+        self.assertIsNot(thermostat._room_state, self.coordinator.room_state("1"))
+
+    async def test_setpoint_writes_through_the_client(self):
+        frost = self.entity(BesmartSetpoint, SETPOINTS, "frost_temperature", "2")
+
+        await frost.async_set_native_value(6.5)
+
+        self.assertEqual(self.server.rooms["2"]["frostT"], "6.5")
+        self.assertEqual(self.server.count("setFrostTemp.php"), 1)
+        self.coordinator.async_request_refresh.assert_awaited()
+
+    async def test_setpoint_is_checked_before_writing(self):
+        comfort = self.entity(BesmartSetpoint, SETPOINTS, "comfort_temperature")
+        requests = self.server.total_requests
+
+        with self.assertRaises(ServiceValidationError):
+            await comfort.async_set_native_value(36.0)
+        await comfort.async_set_native_value(21.0)
+
+        self.assertEqual(self.server.total_requests, requests)
+        self.coordinator.async_request_refresh.assert_not_awaited()
+
+    async def test_rejected_setpoint_raises(self):
+        self.server.reject_writes = 3
+        eco = self.entity(BesmartSetpoint, SETPOINTS, "eco_temperature")
+
+        with self.assertRaises(HomeAssistantError):
+            await eco.async_set_native_value(17.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
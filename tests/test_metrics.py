@@ -0,0 +1,61 @@
+import unittest
+
+from custom_components.besmart.metrics import ERROR, OK, TIMEOUT, ClientMetrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClientMetrics(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.metrics = ClientMetrics(clock=self.clock)
+
+    def test_endpoints_are_named_without_query(self):
+        self.metrics.record("getRoomList.php?deviceId=1", 0, 0.03, OK, 0, 100)
+        self.metrics.record("getRoomList.php?deviceId=2", 0, 0.2, ERROR)
+        self.metrics.record("setRoomMode.php", 0, 12.0, TIMEOUT, 40)
+
+        stats = self.metrics.stats
+        room_list = stats["endpoints"]["getRoomList.php"]
+        self.assertEqual(room_list["count"], 2)
+        self.assertEqual(room_list["errors"], 1)
+        self.assertEqual(room_list["histogram"]["0.05"], 1)
+        self.assertEqual(room_list["histogram"]["0.25"], 1)
+        self.assertEqual(stats["endpoints"]["setRoomMode.php"]["histogram"]["inf"], 1)
+        self.assertEqual(stats["totals"]["timeouts"], 1)
+        self.assertEqual(stats["totals"]["bytes_sent"], 40)
+        self.assertEqual(stats["totals"]["bytes_received"], 100)
+
+    def test_percentiles_come_from_buckets(self):
+        for duration in (0.01,) * 9 + (0.7,):
+            self.metrics.record("login.php", 0, duration, OK)
+
+        stats = self.metrics.endpoints["login.php"]
+        self.assertEqual(stats.percentile(0.5), 0.05)
+        self.assertEqual(stats.percentile(0.95), 1.0)
+
+    def test_logins_age_out_after_an_hour(self):
+        self.metrics.record_login()
+        self.clock.now = 1800
+        self.metrics.record_login()
+        self.clock.now = 3700
+
+        self.assertEqual(self.metrics.logins_last_hour, 1)
+
+    def test_span_hook_sees_every_attempt(self):
+        spans = []
+        self.metrics.span_hook = lambda *span: spans.append(span)
+
+        self.metrics.record("login.php", 5.0, 0.1, OK)
+
+        self.assertEqual(spans, [("login.php", 5.0, 0.1, OK)])
+
+
+if __name__ == '__main__':
+    unittest.main()
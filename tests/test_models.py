@@ -0,0 +1,80 @@
+import unittest
+
+from custom_components.besmart.models import (
+    DeviceSettings,
+    RoomState,
+    check_setpoint,
+    encode_setpoint,
+    setpoint_range,
+    to_celsius,
+)
+from custom_components.besmart.resilience import InvalidSetpointError
+from fake_besmart import make_room, make_settings
+
+
+class TestRoomState(unittest.TestCase):
+    def test_decodes_a_room_payload(self):
+        room = RoomState.from_payload(make_room(7, comfT="21.5", heating="1", bat="1"))
+
+        self.assertEqual(room.ther_id, "7")
+        self.assertEqual(room.comfort, 21.5)
+        self.assertTrue(room.heating)
+        self.assertFalse(room.battery_ok)
+        self.assertEqual(len(room.program), 7)
+        self.assertTrue(room.celsius)
+
+    def test_garbled_fields_fall_back(self):
+        room = RoomState.from_payload({"tempNow": "N/A", "mode": "x", "bat": None})
+
+        self.assertIsNone(room.temp_now)
+        self.assertIsNone(room.temp_out)
+        self.assertEqual(room.mode, 2)
+        self.assertFalse(room.battery_ok)
+        self.assertIsNone(room.program)
+
+    def test_is_immutable(self):
+        room = RoomState.from_payload(make_room(1))
+        with self.assertRaises(AttributeError):
+            room.comfort = 30.0
+
+
+class TestSetpoints(unittest.TestCase):
+    def test_encode_setpoint(self):
+        self.assertEqual(encode_setpoint(21), ("21", "0"))
+        self.assertEqual(encode_setpoint(21.46), ("21", "5"))
+        self.assertEqual(encode_setpoint(-0.5), ("-0", "5"))
+
+    def test_fahrenheit_is_sent_in_celsius(self):
+        self.assertEqual(to_celsius(70.0, "1"), 21.1)
+        self.assertEqual(to_celsius(21.04, "N/A"), 21.0)
+
+    def test_setpoint_range_follows_the_room_unit(self):
+        self.assertEqual(setpoint_range("0"), (2.0, 35.0))
+        self.assertEqual(setpoint_range("1"), (35.6, 95.0))
+        self.assertEqual(check_setpoint("21.5", "0"), 21.5)
+        self.assertEqual(check_setpoint(70, "1"), 70.0)
+        for value, unit in ((1.9, "0"), (36, "N/A"), (30, "1"), ("warm", "0")):
+            with self.assertRaises(InvalidSetpointError):
+                check_setpoint(value, unit)
+
+
+class TestDeviceSettings(unittest.TestCase):
+    def test_round_trip_to_form(self):
+        settings = DeviceSettings.from_payload(make_settings(tempCurver="1.5"))
+
+        form = settings.to_form("0")
+
+        self.assertEqual(form["tempCurveIP"], "1")
+        self.assertEqual(form["tempCurveFP"], "5")
+        self.assertEqual(form["maxTempSetPointIP"], "80")
+        self.assertEqual(form["season"], "0")
+        self.assertEqual(settings.to_form()["season"], "1")
+        self.assertEqual(DeviceSettings.from_payload(settings.to_payload()), settings)
+
+    def test_failed_answer_is_rejected(self):
+        self.assertIsNone(DeviceSettings.from_payload({"error": 1}))
+        self.assertIsNone(DeviceSettings.from_payload(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from datetime import timedelta
+
+from custom_components.besmart.poller import AdaptiveInterval, RoomPoller
+from fake_besmart import make_client, make_room, start_fake
+
+
+class TestRoomPoller(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        rooms = [make_room(i) for i in range(1, 11)]
+        self.server, self.session = start_fake(self, rooms)
+        self.besmart = make_client(self.server, self.session)
+        self.ther_ids = [str(i) for i in range(1, 11)]
+
+    async def test_bulk_poll_uses_room_list(self):
+        poller = RoomPoller(self.besmart, self.ther_ids)
+        for _ in range(10):
+            data = await poller.async_poll()
+
+        self.assertEqual(len(data), 10)
+        self.assertEqual(data["3"]["programWeek"], ["2" * 48] * 7)
+        self.assertEqual(self.server.count("getRoomList.php"), 10)
+        self.assertEqual(self.server.count("getRoomData196.php"), 10)
+
+    async def test_detail_fetches_are_spread_over_polls(self):
+        poller = RoomPoller(self.besmart, self.ther_ids, max_details=4)
+        first = await poller.async_poll()
+        counts = [self.server.count("getRoomData196.php")]
+        for _ in range(3):
+            await poller.async_poll()
+            counts.append(self.server.count("getRoomData196.php"))
+
+        self.assertEqual(counts, [4, 8, 10, 10])
+        self.assertEqual(len(first), 10)
+        # served from the room list until its full payload comes in
+        self.assertEqual(first["10"]["tempNow"], "20.0")
+        self.assertNotIn("programWeek", first["10"])
+
+    async def test_list_fields_override_cached_detail(self):
+        poller = RoomPoller(self.besmart, self.ther_ids)
+        await poller.async_poll()
+        self.server.rooms["4"]["tempNow"] = "22.5"
+        self.server.rooms["4"]["season"] = "0"
+
+        data = await poller.async_poll()
+
+        self.assertEqual(data["4"]["tempNow"], "22.5")
+        # season is not part of the room list and waits for the detail refresh
+        self.assertEqual(data["4"]["season"], "1")
+
+    async def test_expired_room_is_fetched_in_full(self):
+        poller = RoomPoller(self.besmart, self.ther_ids)
+        await poller.async_poll()
+        self.server.rooms["4"]["season"] = "0"
+
+        poller.expire("4")
+        data = await poller.async_poll()
+
+        self.assertEqual(data["4"]["season"], "0")
+        self.assertEqual(self.server.count("getRoomData196.php"), 11)
+
+    async def test_last_known_state_needs_no_request(self):
+        self.assertEqual(RoomPoller(self.besmart, self.ther_ids).last_known(), {})
+        await self.besmart.rooms()
+        requests = self.server.total_requests
+
+        data = RoomPoller(self.besmart, self.ther_ids).last_known()
+
+        self.assertEqual(set(data), set(self.ther_ids))
+        self.assertEqual(data["2"]["comfT"], "21.0")
+        self.assertEqual(self.server.total_requests, requests)
+
+    async def test_room_missing_from_list_is_fetched_every_poll(self):
+        poller = RoomPoller(self.besmart, self.ther_ids + ["42"])
+        self.server.rooms["42"] = make_room(42)
+        self.server.unlisted.add("42")
+
+        await poller.async_poll()
+        data = await poller.async_poll()
+
+        self.assertIn("42", data)
+        self.assertEqual(self.server.count("getRoomData196.php"), 12)
+
+    async def test_per_room_mode(self):
+        poller = RoomPoller(self.besmart, self.ther_ids, bulk=False)
+        await poller.async_poll()
+        await poller.async_poll()
+
+        self.assertEqual(self.server.count("getRoomList.php"), 0)
+        self.assertEqual(self.server.count("getRoomData196.php"), 20)
+
+
+class TestAdaptiveInterval(unittest.TestCase):
+    def setUp(self):
+        self.interval = AdaptiveInterval(
+            timedelta(seconds=60), timedelta(seconds=20), timedelta(seconds=600)
+        )
+
+    def test_heating_polls_fast(self):
+        data = {"1": make_room(1, heating="1"), "2": make_room(2)}
+        self.assertEqual(self.interval.next_interval(data), 20)
+        self.assertEqual(self.interval.reason, "heating")
+
+    def test_everything_off_polls_slow(self):
+        data = {"1": make_room(1, season="0"), "2": make_room(2, mode="5")}
+        self.assertEqual(self.interval.next_interval(data), 600)
+
+    def test_stable_values_back_off_up_to_max(self):
+        data = {"1": make_room(1)}
+        intervals = [self.interval.next_interval(data) for _ in range(20)]
+
+        self.assertEqual(intervals[:4], [60, 60, 60, 120])
+        self.assertEqual(intervals[-1], 600)
+
+        # any change resets the backoff
+        self.assertEqual(self.interval.next_interval({"1": make_room(1, tempNow="20.5")}), 60)
+
+    def test_writes_poll_fast_for_a_few_cycles(self):
+        data = {"1": make_room(1, season="0")}
+        self.interval.note_write()
+
+        intervals = [self.interval.next_interval(data) for _ in range(4)]
+
+        self.assertEqual(intervals, [20, 20, 20, 600])
+
+
+if __name__ == '__main__':
+    unittest.main()
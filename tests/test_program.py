@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime
+
+from custom_components.besmart.program import WeekProgram
+
+# Sunday 2024-01-07 is the first day of the program
+SUNDAY = datetime(2024, 1, 7)
+
+
+def day(eco_from=None, eco_to=None):
+    marks = ["2"] * 48
+    if eco_from is not None:
+        marks[eco_from:eco_to] = ["1"] * (eco_to - eco_from)
+    return "".join(marks)
+
+
+class TestWeekProgram(unittest.TestCase):
+    def setUp(self):
+        # eco from 22:00 to 06:00 every night
+        self.week = ["1" * 12 + "2" * 32 + "1" * 4] * 7
+        self.program = WeekProgram(self.week)
+
+    def test_mark_at(self):
+        self.assertEqual(self.program.mark_at(SUNDAY.replace(hour=5, minute=59)), "1")
+        self.assertEqual(self.program.mark_at(SUNDAY.replace(hour=6)), "2")
+        self.assertEqual(self.program.mark_at(SUNDAY.replace(hour=21, minute=30)), "2")
+        self.assertEqual(self.program.mark_at(SUNDAY.replace(hour=22)), "1")
+
+    def test_next_change(self):
+        self.assertEqual(
+            self.program.next_change(SUNDAY.replace(hour=3, minute=10)),
+            SUNDAY.replace(hour=6),
+        )
+        self.assertEqual(
+            self.program.next_change(SUNDAY.replace(hour=12, minute=45)),
+            SUNDAY.replace(hour=22),
+        )
+
+    def test_next_change_wraps_to_sunday(self):
+        week = [day()] * 6 + [day(40, 48)]
+        program = WeekProgram(week)
+        saturday = datetime(2024, 1, 13, 21)
+
+        self.assertEqual(program.next_change(saturday), datetime(2024, 1, 14))
+
+    def test_flat_program_has_no_change(self):
+        program = WeekProgram([day()] * 7)
+        self.assertIsNone(program.next_change(SUNDAY))
+
+    def test_days_given_as_lists_and_short_programs(self):
+        program = WeekProgram([list("3" * 48), "1" * 10])
+
+        self.assertEqual(program.mark_at(SUNDAY), "3")
+        self.assertEqual(program.mark_at(datetime(2024, 1, 8, 4)), "1")
+        self.assertEqual(program.mark_at(datetime(2024, 1, 8, 6)), "2")
+        self.assertEqual(program.mark_at(datetime(2024, 1, 10)), "2")
+
+    def test_update_rebuilds_only_on_change(self):
+        self.assertIs(WeekProgram.update(self.program, self.week), self.program)
+        self.assertIs(WeekProgram.update(self.program, list(self.week)), self.program)
+        self.assertIsNot(WeekProgram.update(self.program, [day()] * 7), self.program)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import time
+import unittest
+
+from custom_components.besmart.ratelimit import POLL, WRITE, TokenBucket
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+
+        await asyncio.gather(*(bucket.acquire() for _ in range(10)))
+
+        # five at once, five more at 50 per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(bucket.stats["waited"], 5)
+        self.assertEqual(bucket.stats["max_queue_depth"], 5)
+        self.assertEqual(bucket.queue_depth, 0)
+
+    async def test_writes_overtake_queued_polls(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        await bucket.acquire()
+        order = []
+
+        async def request(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        polls = [asyncio.ensure_future(request(f"poll{i}", POLL)) for i in range(3)]
+        await asyncio.sleep(0)
+        write = asyncio.ensure_future(request("write", WRITE))
+        await asyncio.gather(*polls, write)
+
+        self.assertEqual(order, ["write", "poll0", "poll1", "poll2"])
+
+    async def test_cancelled_waiter_gives_up_its_turn(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        await bucket.acquire()
+        first = asyncio.ensure_future(bucket.acquire())
+        second = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await second
+
+        self.assertTrue(first.cancelled())
+        self.assertEqual(bucket.acquired, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
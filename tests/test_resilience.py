@@ -0,0 +1,168 @@
+import asyncio
+import time
+import unittest
+
+from custom_components.besmart.resilience import CircuitBreaker, RetryPolicy
+from fake_besmart import make_client, make_room, start_fake
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay_grows_and_is_capped(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0, rng=lambda: 1.0)
+        self.assertEqual([policy.delay(a) for a in range(5)], [1.0, 2.0, 4.0, 5.0, 5.0])
+
+    def test_delay_is_jittered(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0, rng=lambda: 0.25)
+        self.assertEqual(policy.delay(2), 1.0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_single_probe_after_cool_down(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 30
+
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.clock.now = 60
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.times_opened, 2)
+
+
+class TestBesmartResilience(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server, self.session = start_fake(self, [make_room(1)])
+        self.clock = FakeClock()
+        self.besmart = make_client(
+            self.server,
+            self.session,
+            retry=RetryPolicy(attempts=3, base_delay=0.01),
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=self.clock),
+            read_timeout=0.2,
+        )
+
+    async def test_transient_errors_are_retried(self):
+        self.server.fail_next = 2
+
+        data = await self.besmart.roomByTherId("1")
+
+        self.assertEqual(data["error"], 0)
+        self.assertEqual(self.server.count("login.php"), 3)
+
+    async def test_slow_cloud_times_out_on_read(self):
+        self.server.latency = 0.5
+        start = time.monotonic()
+
+        self.assertIsNone(await self.besmart.roomByTherId("1"))
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    async def test_outage_fails_fast_once_circuit_opens(self):
+        self.server.error_rate = 1.0
+        await self.besmart.roomByTherId("1")
+        await self.besmart.roomByTherId("1")
+        calls = sum(self.server.requests.values())
+
+        for _ in range(5):
+            self.assertIsNone(await self.besmart.roomByTherId("1"))
+
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(sum(self.server.requests.values()), calls)
+
+        self.server.error_rate = 0.0
+        self.clock.now = 30
+        self.assertEqual((await self.besmart.roomByTherId("1"))["error"], 0)
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_probe_answered_with_html_does_not_wedge_the_circuit(self):
+        self.server.error_rate = 1.0
+        await self.besmart.roomByTherId("1")
+        await self.besmart.roomByTherId("1")
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.OPEN)
+
+        self.server.error_rate = 0.0
+        self.server.html_next = 3
+        self.clock.now = 30
+        self.assertFalse(await self.besmart.ensure_login())
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.besmart.metrics.endpoints["login.php"].errors, 9)
+
+        self.clock.now = 60
+        self.assertTrue(await self.besmart.ensure_login())
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_cancelled_probe_releases_the_circuit(self):
+        self.server.error_rate = 1.0
+        await self.besmart.roomByTherId("1")
+        await self.besmart.roomByTherId("1")
+        self.server.error_rate = 0.0
+        self.server.latency = 0.1
+        self.clock.now = 30
+
+        probe = asyncio.ensure_future(self.besmart.ensure_login())
+        await asyncio.sleep(0.02)
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertTrue(await self.besmart.ensure_login())
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.besmart.breaker.rejected, 0)
+
+    async def test_outage_makes_one_login_for_many_rooms(self):
+        self.server.rooms.update({str(i): make_room(i) for i in range(2, 9)})
+        self.server.error_rate = 1.0
+        start = time.monotonic()
+
+        results = await asyncio.gather(
+            *(self.besmart.roomByTherId(str(i)) for i in range(1, 9))
+        )
+
+        self.assertEqual(results, [None] * 8)
+        # one login with its retries, every other room gives up with it
+        self.assertEqual(self.server.count("login.php"), 3)
+        self.assertEqual(self.besmart.logins, 1)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        # a second failed login opens the circuit, after which none is tried
+        await self.besmart.ensure_login()
+        self.assertEqual(self.besmart.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(await self.besmart.ensure_login())
+        self.assertEqual(self.server.count("login.php"), 6)
+
+    async def test_connection_errors_keep_the_session(self):
+        await self.besmart.roomByTherId("1")
+        self.server.fail_next = 3
+
+        self.assertIsNone(await self.besmart.roomByTherId("1"))
+        await self.besmart.roomByTherId("1")
+
+        self.assertEqual(self.server.count("login.php"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from custom_components.besmart.runtime import RuntimeTracker
+
+START = datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc)  # a Monday
+
+
+def feed(tracker, samples, start=START, step=timedelta(minutes=10)):
+    """Feed one heating flag per step, with tempNow 20 and tempOut 5."""
+    when = start
+    for heating in samples:
+        tracker.update(heating, 20.0, 5.0, when)
+        when += step
+    return when - step
+
+
+class TestRuntimeTracker(unittest.TestCase):
+    def test_runtime_and_cycles(self):
+        tracker = RuntimeTracker()
+
+        last = feed(tracker, [False, True, True, False, True, False])
+
+        self.assertAlmostEqual(tracker.today_hours, 0.5)
+        self.assertAlmostEqual(tracker.week_hours, 0.5)
+        self.assertEqual(tracker.total_cycles, 2)
+        self.assertEqual(tracker.cycles_last_hour, 2)
+        self.assertAlmostEqual(tracker.degree_hours, 7.5)
+        self.assertAlmostEqual(tracker.duty_cycle(last), 100 * 1800 / (10 * 3600 + 50 * 60))
+
+    def test_runtime_is_split_at_midnight(self):
+        tracker = RuntimeTracker()
+
+        feed(tracker, [True, True], start=START.replace(hour=23, minute=50))
+
+        self.assertAlmostEqual(tracker.today_hours, 0.0)
+        self.assertAlmostEqual(tracker.total_hours, 1 / 6)
+        self.assertEqual(tracker.cycles_today, 0)
+
+    def test_week_rolls_over_on_monday(self):
+        tracker = RuntimeTracker()
+        feed(tracker, [True, True], start=START - timedelta(days=1))
+
+        feed(tracker, [True, True])
+
+        self.assertAlmostEqual(tracker.week_hours, 1 / 6)
+        self.assertAlmostEqual(tracker.total_hours, 2 / 6)
+
+    def test_long_gaps_are_not_counted(self):
+        tracker = RuntimeTracker()
+
+        feed(tracker, [True, True], step=timedelta(hours=2))
+
+        self.assertEqual(tracker.total_hours, 0)
+
+    def test_unknown_temperatures_add_no_degree_hours(self):
+        tracker = RuntimeTracker()
+
+        tracker.update(True, 20.0, None, START)
+        tracker.update(True, None, 5.0, START + timedelta(minutes=10))
+        tracker.update(False, 20.0, 5.0, START + timedelta(minutes=20))
+
+        self.assertAlmostEqual(tracker.today_hours, 1 / 3)
+        self.assertEqual(tracker.degree_hours, 0.0)
+
+    def test_compact_round_trip(self):
+        tracker = RuntimeTracker()
+        feed(tracker, [False, True, True])
+
+        restored = RuntimeTracker.from_list(tracker.as_list())
+
+        self.assertEqual(restored.as_list(), tracker.as_list())
+        # the first poll after a restart neither books time nor counts a cycle
+        restored.update(True, 20.0, 5.0, START + timedelta(hours=1))
+        self.assertEqual(restored.total_cycles, 1)
+        self.assertAlmostEqual(restored.today_hours, 1 / 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
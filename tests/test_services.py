@@ -0,0 +1,87 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.besmart.const import DATA_CLIENTS, DOMAIN
+from custom_components.besmart.coordinator import BesmartCoordinator
+from custom_components.besmart.services import APPLY_PROFILE_SCHEMA, async_apply_profile
+from fake_besmart import make_client, make_room, start_fake
+
+
+class TestApplyProfile(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server, self.session = start_fake(self, [make_room(i) for i in range(1, 7)])
+        besmart = make_client(self.server, self.session)
+        ther_ids = [str(i) for i in range(1, 7)]
+        self.coordinator = BesmartCoordinator(MagicMock(), besmart, ther_ids, write_delay=0)
+        self.coordinator.async_request_refresh = AsyncMock()
+        self.hass = MagicMock()
+        self.hass.data = {DOMAIN: {DATA_CLIENTS: {}, "entry": self.coordinator}}
+
+    async def test_writes_every_room_with_one_login(self):
+        rooms = APPLY_PROFILE_SCHEMA(
+            {
+                "rooms": [
+                    {"ther_id": str(i), "preset_mode": "eco", "eco_temperature": "16.5"}
+                    for i in range(1, 6)
+                ]
+                + [{"ther_id": "6", "hvac_mode": "off"}]
+            }
+        )["rooms"]
+
+        results = await async_apply_profile(self.hass, rooms, parallel=2)
+
+        self.assertEqual(results["1"], {"preset_mode": True, "eco_temperature": True})
+        self.assertEqual(results["6"], {"hvac_mode": True})
+        self.assertEqual(self.server.rooms["5"]["mode"], "1")
+        self.assertEqual(self.server.rooms["5"]["saveT"], "16.5")
+        self.assertEqual(self.server.rooms["6"]["season"], "0")
+        self.assertEqual(self.server.count("login.php"), 1)
+        self.coordinator.async_request_refresh.assert_awaited_once()
+
+    async def test_rooms_wait_out_the_write_delay_together(self):
+        self.server.latency = 0.05
+        # the default write delay, not the immediate one of the other tests
+        self.coordinator = BesmartCoordinator(
+            MagicMock(), self.coordinator.besmart, self.coordinator.ther_ids
+        )
+        self.coordinator.async_request_refresh = AsyncMock()
+        self.hass.data[DOMAIN]["entry"] = self.coordinator
+        rooms = [{"ther_id": str(i), "preset_mode": "eco"} for i in range(1, 7)]
+        start = time.monotonic()
+
+        results = await async_apply_profile(self.hass, rooms, parallel=2)
+
+        self.assertTrue(all(r == {"preset_mode": True} for r in results.values()))
+        # one write delay plus 3 rounds of requests, not one delay per round
+        self.assertLess(time.monotonic() - start, 1.8)
+
+    async def test_failed_writes_are_reported_per_room(self):
+        self.server.reject_writes = 3
+
+        results = await async_apply_profile(
+            self.hass, [{"ther_id": "2", "comfort_temperature": 22.0}]
+        )
+
+        self.assertEqual(results, {"2": {"comfort_temperature": False}})
+
+    async def test_unknown_rooms_are_rejected_before_writing(self):
+        with self.assertRaises(ServiceValidationError):
+            await async_apply_profile(
+                self.hass, [{"ther_id": "1", "preset_mode": "eco"}, {"ther_id": "99"}]
+            )
+        self.assertEqual(self.server.total_requests, 0)
+
+    async def test_out_of_range_setpoints_are_rejected_before_writing(self):
+        with self.assertRaises(ServiceValidationError):
+            await async_apply_profile(
+                self.hass,
+                [{"ther_id": "1", "preset_mode": "eco"}, {"ther_id": "2", "frost_temperature": 0.5}],
+            )
+        self.assertEqual(self.server.total_requests, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
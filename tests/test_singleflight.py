@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+
+from custom_components.besmart.singleflight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def fetch(self):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        return {"call": call}
+
+    async def test_concurrent_reads_are_merged(self):
+        flight = SingleFlight()
+        waiters = [asyncio.ensure_future(flight.do("room", self.fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*waiters)
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flight.stats["merged"], 4)
+        self.assertEqual(flight.stats["saved_ratio"], 0.8)
+
+        # without a cache the next read goes out again
+        await flight.do("room", self.fetch)
+        self.assertEqual(self.calls, 2)
+
+    async def test_cache_serves_fresh_answers(self):
+        clock = FakeClock()
+        flight = SingleFlight(ttl=2.0, clock=clock)
+        self.release.set()
+
+        await flight.do("room", self.fetch)
+        await flight.do("room", self.fetch)
+        clock.now = 3.0
+        await flight.do("room", self.fetch)
+        flight.invalidate("room")
+        await flight.do("room", self.fetch)
+
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(flight.hits, 1)
+
+    async def test_invalidate_detaches_reads_in_flight(self):
+        flight = SingleFlight(ttl=60)
+        before = asyncio.ensure_future(flight.do("room", self.fetch))
+        await asyncio.sleep(0)
+
+        flight.invalidate("room")
+        after = asyncio.ensure_future(flight.do("room", self.fetch))
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await before, {"call": 1})
+        self.assertEqual(await after, {"call": 2})
+        self.assertEqual(flight.merged, 0)
+        # only the read started after the invalidation is cached
+        self.assertEqual(await flight.do("room", self.fetch), {"call": 2})
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("room", self.fetch))
+        second = asyncio.ensure_future(flight.do("room", self.fetch))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        self.release.set()
+
+        self.assertEqual(await second, {"call": 1})
+
+    async def test_failures_are_shared_and_not_cached(self):
+        flight = SingleFlight(ttl=60)
+
+        async def fail():
+            self.calls += 1
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("room", fail), flight.do("room", fail), return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        with self.assertRaises(ValueError):
+            await flight.do("room", fail)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+
+from custom_components.besmart.writes import WriteQueue
+
+
+class FakeClock:
+    """Hands out sleeps that only finish when the test advances time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers = []
+
+    async def sleep(self, delay):
+        future = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self.now + delay, future))
+        await future
+
+    async def advance(self, seconds):
+        await self._run_ready()
+        self.now += seconds
+        for due, future in list(self._sleepers):
+            if due <= self.now:
+                self._sleepers.remove((due, future))
+                future.set_result(None)
+        await self._run_ready()
+
+    @staticmethod
+    async def _run_ready():
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+
+class RecordingWriter:
+    def __init__(self, result=True):
+        self.calls = []
+        self.result = result
+
+    def __call__(self, name):
+        async def write(value):
+            self.calls.append((name, value))
+            return self.result
+        return write
+
+
+class TestWriteQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = WriteQueue(delay=1.0, sleep=self.clock.sleep)
+        self.writer = RecordingWriter()
+
+    async def test_burst_sends_only_last_value(self):
+        tasks = [
+            asyncio.create_task(self.queue.submit("1", "comfort", t, self.writer("1")))
+            for t in (20.0, 20.5, 21.0, 21.5)
+        ]
+        await self.clock.advance(0.5)
+        self.assertEqual(self.writer.calls, [])
+
+        await self.clock.advance(0.5)
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(self.writer.calls, [("1", 21.5)])
+        self.assertEqual(results, [True] * 4)
+        self.assertEqual(self.queue.writes_coalesced, 3)
+        self.assertEqual(self.queue.writes_sent, 1)
+
+    async def test_different_kinds_are_not_coalesced(self):
+        tasks = [
+            asyncio.create_task(self.queue.submit("1", "comfort", 21.0, self.writer("1"))),
+            asyncio.create_task(self.queue.submit("1", "eco", 17.0, self.writer("1"))),
+        ]
+        await self.clock.advance(1.0)
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(self.writer.calls, [("1", 21.0), ("1", 17.0)])
+        self.assertEqual(self.queue.writes_coalesced, 0)
+
+    async def test_rooms_are_written_concurrently(self):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def slow_write(value):
+            calls.append(value)
+            started.set()
+            await release.wait()
+            return True
+
+        first = asyncio.create_task(self.queue.submit("1", "mode", "3", slow_write))
+        second = asyncio.create_task(self.queue.submit("2", "mode", "2", slow_write))
+        await self.clock.advance(1.0)
+
+        # room 2 is not stuck behind the write in flight for room 1
+        self.assertEqual(calls, ["3", "2"])
+        release.set()
+        await asyncio.gather(first, second)
+
+    async def test_failed_writes_are_counted(self):
+        self.writer.result = None
+        task = asyncio.create_task(self.queue.submit("1", "comfort", 21.0, self.writer("1")))
+        await self.clock.advance(1.0)
+
+        self.assertIsNone(await task)
+        self.assertEqual(self.queue.writes_failed, 1)
+        self.assertEqual(self.queue.writes_dropped, 0)
+
+    async def test_cancel_releases_waiting_callers(self):
+        task = asyncio.create_task(self.queue.submit("1", "comfort", 21.0, self.writer("1")))
+        await asyncio.sleep(0)
+
+        self.queue.cancel()
+
+        self.assertIsNone(await task)
+        self.assertEqual(self.writer.calls, [])
+        self.assertEqual(self.queue.stats["writes_dropped"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()